@@ -1,3 +1,5 @@
+from .prompt_suggestion.bulk import format_sent_prompt, qna_prefix, qna_query
+
 def modify_command(Command):
     print("Do you want to modify the instruction?")
     Ask = input("\n(Enter 0 for No, 1 for Yes): ")
@@ -45,91 +47,79 @@ class prompt_suggest:
         self.lastname = 'Sontesadisai'
         self.nickname = 'Kafka'
 
-    def std_sent(template: str):
+    def std_sent(template: str, cot=False):
         """
-        ...
-        
-        
+        Build a sentiment classification prompt interactively.
+
+        For whole datasets, use prompt_suggestion.bulk.BulkPromptBuilder instead.
         """
         # Instruction of Standard Prompting
         Command = "Classify the sentiment of the text: "
         new_command = modify_command(Command)
         Command = new_command
 
-        if template == 'Zero Shot':
-            Text = input("Enter the text for sentiment analysis: ")
-            Expected_output = input("Enter the expected output: ")
-
-            Prompt = Command+"\n\nText: "+Text+"\nSentiment:"
-            return Prompt, Expected_output
-        elif template == 'One Shot':
+        examples = []
+        if template == 'One Shot':
             Text = input("Enter the text example: ")
             Sentiment = input("Enter the answer for the example: ")
-
-            Text_2 = input("Enter the text example: ")
-            Prompt = f"{Command}\n\nExample 1\nText: \"{Text}\"\nSentiment: {Sentiment}\n\nText: {Text_2}\nSentiment:"
-           
-            Expected_output = input("Enter the expected output: ")
-            return Prompt, Expected_output
+            examples.append((Text, Sentiment))
         elif template == 'Few Shot':
             count = int(input("Enter the number of examples: "))
-            Text = ''
             for i in range(count):
                 example_text = input(f"Enter text for example {i+1}: ")
                 example_sentiment = input(f"Enter sentiment for example {i+1} : ")
-                Text += f"Text: \"{example_text}\"\nSentiment: {example_sentiment}\n\n"
+                examples.append((example_text, example_sentiment))
+        elif template != 'Zero Shot':
+            return None
+
+        if template == 'Zero Shot':
+            Text_2 = input("Enter the text for sentiment analysis: ")
+        else:
             Text_2 = input("Enter the text example: ")
-            Expected_output = input("Enter the expected output: ")
+        Expected_output = input("Enter the expected output: ")
 
-            Prompt = Command+"\n\n"+Text + f"Text: {Text_2} \nSentiment:"
-            return Prompt, Expected_output
+        Prompt = format_sent_prompt(Text_2, template, examples, Command, cot)
+        return Prompt, Expected_output
         
 
-    def std_qna(template: str):
+    def std_qna(template: str, cot=False):
+        """
+        Build a question answering prompt interactively.
+
+        For whole datasets, use prompt_suggestion.bulk.BulkPromptBuilder instead.
+        """
         Instr = get_instruction()
         Context = get_context()
 
-        if template == 'Zero Shot':
-            Q = input("Enter the Question: ")
-            Expected_output = input("Enter the Expected Output: ")
-
-            Prompt = f"""{Instr}\n{Context}Q: {Q}\nA:"""
-            return Prompt, Expected_output
-
-        elif template == 'One Shot':
+        examples = []
+        if template == 'One Shot':
             # One example input from the user
             Q_1 = input("Enter the Question #1: ")
             A_1 = input("Enter the Answer #1: ")
-
-            Q = input("Enter the Question: ")
-            Prompt = f"{Instr}\n{Context}\nQ: \"{Q_1}\"\nA: {A_1}\n\nQ: {Q}\nA:"
-            Expected_output = input("Enter the expected output: ")
-
-            return Prompt, Expected_output
-
+            examples.append((Q_1, A_1))
         elif template == 'Few Shot':
             count = int(input("Enter the number of examples: "))
-            Text = ''
             for i in range(count):
                 example_text = input(f"Enter the Question #{i+1}: ")
-                example_sentiment = input(f"Enter the Answer #{i+1} : ")
-                Text += f"Q: \"{example_text}\"\nA: {example_sentiment}\n\n"
+                example_answer = input(f"Enter the Answer #{i+1} : ")
+                examples.append((example_text, example_answer))
+        elif template != 'Zero Shot':
+            return None
 
-            Q = input("Enter the Question: ")
-            A = input("Enter the Expected Output: ")
+        Q = input("Enter the Question: ")
+        Expected_output = input("Enter the Expected Output: ")
 
-            Prompt = f"""{Instr}\n{Context}\n{Text}Q: {Q} \nA:"""
-            return Prompt, Expected_output
+        Prompt = qna_prefix(template, examples, f"{Instr}\n{Context}") + qna_query(template, Q, cot)
+        return Prompt, Expected_output
 
     def cot_sent(template: str):
-        return ''
+        return prompt_suggest.std_sent(template, cot=True)
     
     def cot_qna(template: str):
-        return ''
+        return prompt_suggest.std_qna(template, cot=True)
 
     
 
-
     # dependecies of ,y libr installation
     # get template
     # name
@@ -137,7 +127,6 @@ class prompt_suggest:
     # แยก module ยังไงให้ใช้งานง่าย??
 
 myjublek = prompt_suggest()
-print(myjublek.name)
 
 # import prompt_suggest
 # import prompt_scoring
\ No newline at end of file
@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+
+GROUP_KEYS = ('capability', 'model_name', 'pass_condition')
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Label of results whose group column is empty, e.g. tests without a capability.
+MISSING = '(none)'
+
+# Score deltas lie in [-2, 2]; streaming percentiles are resolved to the bin width.
+DELTA_BINS = np.linspace(-2, 2, 401)
+
+def results_frame(results, by=GROUP_KEYS):
+    """
+    Put per-test results into a DataFrame with filled group columns and the per-test terms of the
+    weighted statistics: weighted_fail, score_delta, delta_weight, sum_delta and sum_sq_delta.
+
+    Results without a weight count once.
+
+    Parameters:
+    results (list or DataFrame): Results as returned by Test.summarize() or load_results().
+    by (tuple): The group columns.
+
+    Returns:
+    DataFrame: The results.
+    """
+    df = pd.DataFrame(results)
+    for column in by:
+        df[column] = df[column].fillna(MISSING) if column in df else MISSING
+    for column in ('fail', 'score_original', 'score_perturb'):
+        if column not in df:
+            df[column] = pd.Series(dtype=object)
+    df['fail'] = df['fail'].astype(bool)
+    weights = pd.to_numeric(df['weight'], errors='coerce') if 'weight' in df else pd.Series(1, index=df.index)
+    df['weight'] = weights.fillna(1).astype(float)
+    df['weighted_fail'] = df['weight'] * df['fail']
+    df['score_delta'] = (pd.to_numeric(df['score_perturb'], errors='coerce')
+                         - pd.to_numeric(df['score_original'], errors='coerce'))
+    has_delta = df['score_delta'].notna()
+    df['delta_weight'] = df['weight'].where(has_delta, 0.0)
+    df['sum_delta'] = (df['weight'] * df['score_delta']).where(has_delta, 0.0)
+    df['sum_sq_delta'] = (df['weight'] * df['score_delta'] ** 2).where(has_delta, 0.0)
+    return df
+
+def delta_moments(delta_weight, sum_delta, sum_sq_delta):
+    """
+    Compute the weighted mean and standard deviation of score deltas from their running sums.
+
+    Weights count as repetitions, so with unit weights these are the ordinary mean and sample std.
+
+    Parameters:
+    delta_weight (ndarray): The total weight of the deltas of each group.
+    sum_delta (ndarray): The weighted sum of the deltas of each group.
+    sum_sq_delta (ndarray): The weighted sum of the squared deltas of each group.
+
+    Returns:
+    ndarray: The mean of each group, NaN for groups without deltas.
+    ndarray: The standard deviation of each group, NaN for groups with a weight of 1 or less.
+    """
+    delta_weight, sum_delta, sum_sq_delta = (np.asarray(values, dtype=float)
+                                             for values in (delta_weight, sum_delta, sum_sq_delta))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(delta_weight > 0, sum_delta / delta_weight, np.nan)
+        variance = (sum_sq_delta - delta_weight * mean ** 2) / (delta_weight - 1)
+        std = np.where(delta_weight > 1, np.sqrt(np.maximum(variance, 0)), np.nan)
+    return mean, std
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+    Compute quantiles as if each value were repeated weight times, interpolating linearly between ranks.
+
+    With unit weights this is the default linear interpolation of pandas and numpy.
+
+    Parameters:
+    values (ndarray): The values.
+    weights (ndarray): The weight of each value.
+    quantiles (list): The quantiles, between 0 and 1.
+
+    Returns:
+    ndarray: The value at each quantile, NaN when there are no values.
+    """
+    if len(values) == 0:
+        return np.full(len(quantiles), np.nan)
+    order = np.argsort(values, kind='stable')
+    values = np.asarray(values, dtype=float)[order]
+    cumulative = np.cumsum(np.asarray(weights, dtype=float)[order])
+    ranks = np.asarray(quantiles, dtype=float) * max(cumulative[-1] - 1, 0)
+    lower = np.floor(ranks)
+    last = len(values) - 1
+    below = values[np.minimum(np.searchsorted(cumulative, lower, side='right'), last)]
+    above = values[np.minimum(np.searchsorted(cumulative, lower + 1, side='right'), last)]
+    return below + (above - below) * (ranks - lower)
+
+def analyze(results, by=GROUP_KEYS, percentiles=PERCENTILES):
+    """
+    Compute fail rates and score-delta distributions per group.
+
+    Every statistic counts each test by its weight, so a deduplicated suite reports the same
+    fail rates as summarize_results' weighted_fail_rate, and a kept test's score delta stands
+    for the tests it replaced.
+
+    Parameters:
+    results (list or DataFrame): Results as returned by Test.summarize() or load_results().
+    by (str or tuple): The column(s) to group by. Defaults to capability, model_name and pass_condition.
+    percentiles (tuple): The score-delta percentiles to report.
+
+    Returns:
+    DataFrame: One row per group with total, failures, fail_rate, mean_delta, std_delta
+        and delta_p<q> columns, empty when there are no results. score_delta is
+        score_perturb - score_original.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    df = results_frame(results, by)
+    grouped = df.groupby(by)
+    table = grouped.agg(
+        total=('weight', 'sum'),
+        failures=('weighted_fail', 'sum'),
+        delta_weight=('delta_weight', 'sum'),
+        sum_delta=('sum_delta', 'sum'),
+        sum_sq_delta=('sum_sq_delta', 'sum')
+    )
+    table['mean_delta'], table['std_delta'] = delta_moments(
+        table.pop('delta_weight'), table.pop('sum_delta'), table.pop('sum_sq_delta'))
+    table['fail_rate'] = table['failures'] / table['total'] * 100
+
+    quantiles = [q / 100 for q in percentiles]
+    rows = []
+    for _, group in grouped:
+        deltas = group[group['score_delta'].notna()]
+        rows.append(weighted_quantiles(deltas['score_delta'].to_numpy(), deltas['weight'].to_numpy(), quantiles))
+    estimates = np.array(rows).reshape(len(table), len(quantiles))
+    for j, q in enumerate(percentiles):
+        table[f"delta_p{q}"] = estimates[:, j]
+    return table
+
+class ResultAnalytics:
+    """
+    Group-by analytics maintained incrementally as results stream in.
+
+    Each update only aggregates the new results and adds them to running per-group totals and
+    score-delta histograms, so reporting never needs the full history again. Percentiles are
+    estimated from the histograms. Like analyze(), every statistic counts each test by its weight.
+    """
+    def __init__(self, by=GROUP_KEYS, bins=DELTA_BINS):
+        """
+        Initialize a new ResultAnalytics instance.
+
+        Parameters:
+        by (str or tuple): The column(s) to group by. Defaults to capability, model_name and pass_condition.
+        bins (ndarray): The score-delta histogram bin edges.
+        """
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.bins = np.asarray(bins, dtype=float)
+        self.keys = []
+        self.index = {}
+        self.totals = np.zeros((0, 5))
+        self.histograms = np.zeros((0, len(self.bins) - 1))
+
+    def update(self, results):
+        """
+        Add a batch of results.
+
+        Parameters:
+        results (list or DataFrame): Results as returned by Test.summarize() or load_results().
+        """
+        if len(results) == 0:
+            return
+        df = results_frame(results, self.by)
+        delta = df['score_delta'].to_numpy(dtype=float)
+        has_delta = ~np.isnan(delta)
+
+        grouped = df.groupby(self.by, sort=False)
+        batch = grouped.agg(
+            total=('weight', 'sum'),
+            failures=('weighted_fail', 'sum'),
+            delta_weight=('delta_weight', 'sum'),
+            sum_delta=('sum_delta', 'sum'),
+            sum_sq_delta=('sum_sq_delta', 'sum')
+        )
+        codes = grouped.ngroup().to_numpy()
+        bin_index = np.clip(np.searchsorted(self.bins, delta[has_delta], side='right') - 1, 0, len(self.bins) - 2)
+        histograms = np.zeros((len(batch), len(self.bins) - 1))
+        np.add.at(histograms, (codes[has_delta], bin_index), df['weight'].to_numpy()[has_delta])
+
+        keys = [key if isinstance(key, tuple) else (key,) for key in batch.index]
+        for key in keys:
+            if key not in self.index:
+                self.index[key] = len(self.keys)
+                self.keys.append(key)
+        rows = [self.index[key] for key in keys]
+        grow = len(self.keys) - len(self.totals)
+        if grow:
+            self.totals = np.vstack([self.totals, np.zeros((grow, self.totals.shape[1]))])
+            self.histograms = np.vstack([self.histograms, np.zeros((grow, self.histograms.shape[1]))])
+        self.totals[rows] += batch.to_numpy(dtype=float)
+        self.histograms[rows] += histograms
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """
+        Estimate score-delta percentiles of every group from its histogram.
+
+        Parameters:
+        percentiles (tuple): The percentiles to estimate.
+
+        Returns:
+        ndarray: One row per group and one column per percentile, NaN for groups without deltas.
+        """
+        cumulative = np.cumsum(self.histograms, axis=1)
+        counts = cumulative[:, -1:] if len(cumulative) else np.zeros((0, 1))
+        estimates = np.full((len(self.keys), len(percentiles)), np.nan)
+        for j, q in enumerate(percentiles):
+            target = counts[:, 0] * q / 100
+            bin_index = np.argmax(cumulative >= target[:, None], axis=1)
+            before = np.where(bin_index > 0, cumulative[np.arange(len(bin_index)), bin_index - 1], 0)
+            inside = self.histograms[np.arange(len(bin_index)), bin_index]
+            fraction = np.divide(target - before, inside, out=np.zeros_like(target), where=inside > 0)
+            value = self.bins[bin_index] + (self.bins[bin_index + 1] - self.bins[bin_index]) * fraction
+            estimates[:, j] = np.where(counts[:, 0] > 0, value, np.nan)
+        return estimates
+
+    def summary(self, percentiles=PERCENTILES):
+        """
+        Report the running analytics.
+
+        Parameters:
+        percentiles (tuple): The score-delta percentiles to report.
+
+        Returns:
+        DataFrame: The same columns as analyze(), with percentiles estimated from the histograms.
+        """
+        index = pd.MultiIndex.from_tuples(self.keys, names=self.by) if self.keys else None
+        total, failures, delta_weight, sum_delta, sum_sq_delta = self.totals.T
+        mean, std = delta_moments(delta_weight, sum_delta, sum_sq_delta)
+        table = pd.DataFrame({
+            'total': total,
+            'failures': failures,
+            'mean_delta': mean,
+            'std_delta': std,
+            'fail_rate': np.divide(failures, total, out=np.zeros_like(total), where=total > 0) * 100
+        }, index=index)
+        estimates = self.percentiles(percentiles)
+        for j, q in enumerate(percentiles):
+            table[f"delta_p{q}"] = estimates[:, j]
+        if len(self.by) == 1 and self.keys:
+            table.index = table.index.get_level_values(0)
+        return table
@@ -0,0 +1,141 @@
+import re
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from .test import SIMILARITY_MODEL_NAME, batch_similarity
+
+# Scoring stages, cheapest first.
+STAGES = ('exact', 'token_f1', 'char_ngram', 'embedding')
+
+def normalize_text(text):
+    """
+    Normalize a text for lexical comparison: lowercase, drop punctuation and collapse whitespace.
+
+    Parameters:
+    text (str): The text to normalize.
+
+    Returns:
+    str: The normalized text.
+    """
+    return ' '.join(re.sub(r'[^\w\s]', ' ', str(text).lower()).split())
+
+def _rowwise(values):
+    """
+    Flatten the (n, 1) matrix returned by a sparse row sum into a 1-D array.
+    """
+    return np.asarray(values).ravel().astype(float)
+
+class CascadeScorer:
+    """
+    Score response/expected pairs with cheap lexical stages before falling back to embeddings.
+
+    Each stage scores the pairs the previous stages left undecided, all at once. Exact matches
+    score 1.0, as they would under the embedding model. A lexical stage decides a group of pairs,
+    such as the two responses of one test, only when every undecided pair of the group reaches
+    the stage threshold; their similarities then become their scores, so the scores compared
+    within a group always come from the same scale. Only the remaining pairs reach the embedding model.
+    """
+    def __init__(self, model=None, token_f1_threshold=0.9, ngram_threshold=0.9, ngram_size=3,
+                 model_name=SIMILARITY_MODEL_NAME):
+        """
+        Initialize a new CascadeScorer instance.
+
+        Parameters:
+        model (SentenceTransformer, optional): The model for the embedding stage. Defaults to the shared similarity model.
+        token_f1_threshold (float, optional): The token F1 needed to accept a pair. None disables the stage.
+        ngram_threshold (float, optional): The character n-gram cosine needed to accept a pair. None disables the stage.
+        ngram_size (int): The character n-gram length. Defaults to 3.
+        model_name (str): The name of the embedding model, used to identify the scorer configuration.
+        """
+        self.model = model
+        self.token_f1_threshold = token_f1_threshold
+        self.ngram_threshold = ngram_threshold
+        self.ngram_size = ngram_size
+        self.name = f"cascade:{model_name}:f1={token_f1_threshold}:ngram={ngram_threshold}:n={ngram_size}"
+        self.token_vectorizer = HashingVectorizer(
+            tokenizer=str.split, token_pattern=None, lowercase=False,
+            norm=None, alternate_sign=False
+        )
+        self.ngram_vectorizer = HashingVectorizer(
+            analyzer='char_wb', ngram_range=(ngram_size, ngram_size), lowercase=False,
+            norm='l2', alternate_sign=False
+        )
+
+    def token_f1(self, texts_a, texts_b):
+        """
+        Compute the bag-of-tokens F1 of each pair of normalized texts.
+
+        Parameters:
+        texts_a (list): The first text of each pair.
+        texts_b (list): The second text of each pair.
+
+        Returns:
+        ndarray: The token F1 of each pair.
+        """
+        counts_a = self.token_vectorizer.transform(texts_a)
+        counts_b = self.token_vectorizer.transform(texts_b)
+        overlap = _rowwise(counts_a.minimum(counts_b).sum(axis=1))
+        total = _rowwise(counts_a.sum(axis=1)) + _rowwise(counts_b.sum(axis=1))
+        return np.divide(2 * overlap, total, out=np.zeros_like(overlap), where=total > 0)
+
+    def ngram_similarity(self, texts_a, texts_b):
+        """
+        Compute the character n-gram cosine similarity of each pair of normalized texts.
+
+        Parameters:
+        texts_a (list): The first text of each pair.
+        texts_b (list): The second text of each pair.
+
+        Returns:
+        ndarray: The n-gram similarity of each pair.
+        """
+        vectors_a = self.ngram_vectorizer.transform(texts_a)
+        vectors_b = self.ngram_vectorizer.transform(texts_b)
+        return _rowwise(vectors_a.multiply(vectors_b).sum(axis=1))
+
+    def score(self, pairs, groups=None):
+        """
+        Score text pairs through the cascade.
+
+        Parameters:
+        pairs (list): A list of (response, expected_result) tuples.
+        groups (list, optional): The group of each pair. Pairs whose scores are compared with
+            each other must share a group. Defaults to a group per pair.
+
+        Returns:
+        list: The score of each pair, in order.
+        list: The stage that produced each score, in order.
+        """
+        scores = [None] * len(pairs)
+        stages = [None] * len(pairs)
+        if not pairs:
+            return scores, stages
+
+        groups = list(range(len(pairs))) if groups is None else list(groups)
+        normalized = [(normalize_text(a), normalize_text(b)) for a, b in pairs]
+        pending = []
+        for i, (a, b) in enumerate(normalized):
+            if a == b:
+                scores[i], stages[i] = 1.0, 'exact'
+            else:
+                pending.append(i)
+
+        lexical_stages = (
+            ('token_f1', self.token_f1, self.token_f1_threshold),
+            ('char_ngram', self.ngram_similarity, self.ngram_threshold),
+        )
+        for stage, similarity, threshold in lexical_stages:
+            if threshold is None or not pending:
+                continue
+            values = similarity([normalized[i][0] for i in pending], [normalized[i][1] for i in pending])
+            rejected = {groups[i] for i, value in zip(pending, values) if value < threshold}
+            undecided = []
+            for i, value in zip(pending, values):
+                if groups[i] in rejected:
+                    undecided.append(i)
+                else:
+                    scores[i], stages[i] = float(value), stage
+            pending = undecided
+
+        for i, value in zip(pending, batch_similarity([pairs[i] for i in pending], self.model)):
+            scores[i], stages[i] = value, 'embedding'
+        return scores, stages
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import pandas as pd
+from ..utils import set_openai_api_key
+from .cascade import CascadeScorer
+from .scheduler import RequestScheduler
+from .test_suite import TestSuite, summarize_results, load_results, write_table
+
+def parse_shard(value):
+    """
+    Parse a shard specification of the form 'i/n'.
+
+    Parameters:
+    value (str): The shard specification, with 1 <= i <= n.
+
+    Returns:
+    tuple: The 1-based shard index and the shard count.
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected the form i/n")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 1 <= i <= n")
+    return index, count
+
+def run(args, qa_model="openai"):
+    """
+    Run the tests of a definition file, or one shard of them, and write the per-test results.
+
+    Parameters:
+    args (Namespace): The parsed arguments of the run command.
+    qa_model: The model to use for generating responses. Defaults to the OpenAI API.
+    """
+    if not args.overwrite and os.path.exists(args.output):
+        raise SystemExit(f"File {args.output} already exists. Pass --overwrite to overwrite the file.")
+
+    if qa_model == "openai":
+        set_openai_api_key(args.api_key)
+    suite = TestSuite.from_file(args.tests)
+    if args.dedup is not None:
+        # Before sharding, so every node derives the same deduplicated suite.
+        suite = suite.deduplicate(args.dedup)
+        print(f"Removed {suite.dedup_report['removed']} near-duplicate tests.")
+    if args.shard:
+        suite = suite.shard(*args.shard)
+
+    scorer = CascadeScorer() if args.cascade else None
+    scheduler = None
+    if args.timeout is not None or args.hedge_percentile is not None:
+        scheduler = RequestScheduler(max_workers=args.concurrency, timeout=args.timeout,
+                                     hedge_percentile=args.hedge_percentile)
+    if args.previous:
+        diff = suite.rerun(load_results(args.previous), qa_model, args.model, args.system_message,
+                           max_workers=args.concurrency, scorer=scorer, scheduler=scheduler,
+                           pack_size=args.pack_size)
+    else:
+        suite.run_all(qa_model, args.model, args.system_message, max_workers=args.concurrency,
+                      scorer=scorer, scheduler=scheduler, pack_size=args.pack_size)
+    results, summary = suite.summarize()
+    write_table(pd.DataFrame(results), args.output)
+    print(json.dumps(summary, indent=2))
+    if scheduler is not None:
+        print(json.dumps(suite.latency_report, indent=2))
+    if args.pack_size is not None:
+        print(json.dumps(suite.packing_report, indent=2))
+    if args.previous:
+        print(json.dumps(diff, indent=2, default=str))
+
+def merge(args, qa_model=None):
+    """
+    Combine the results of several shards into a single report.
+
+    Parameters:
+    args (Namespace): The parsed arguments of the merge command.
+    qa_model: Unused; accepted so every command has the same signature.
+    """
+    results = []
+    for filename in args.inputs:
+        results.extend(load_results(filename))
+
+    if args.output:
+        if not args.overwrite and os.path.exists(args.output):
+            raise SystemExit(f"File {args.output} already exists. Pass --overwrite to overwrite the file.")
+        write_table(pd.DataFrame(results), args.output)
+    print(json.dumps(summarize_results(results), indent=2))
+
+def build_parser():
+    """
+    Build the argument parser of the promptops command.
+
+    Returns:
+    ArgumentParser: The configured parser.
+    """
+    parser = argparse.ArgumentParser(prog='promptops', description='Run PromptOps test suites in batch.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the tests of a CSV, JSONL or Parquet file.')
+    run_parser.add_argument('tests', help='Test definition file (.csv, .jsonl or .parquet).')
+    run_parser.add_argument('--output', required=True, help='Results file (.csv, .jsonl or .parquet).')
+    run_parser.add_argument('--model', default='gpt-3.5-turbo', help='The OpenAI model to test.')
+    run_parser.add_argument('--system-message', default='You are a helpful assistant.',
+                            help='The system message providing context for the model.')
+    run_parser.add_argument('--concurrency', type=int, default=1, help='Number of tests to run concurrently.')
+    run_parser.add_argument('--shard', type=parse_shard, help="Run only shard i of n, given as 'i/n'.")
+    run_parser.add_argument('--dedup', type=float, metavar='THRESHOLD',
+                            help='Collapse tests whose prompts reach this cosine similarity into one weighted test.')
+    run_parser.add_argument('--cascade', action='store_true',
+                            help='Score with cheap lexical stages before falling back to embeddings.')
+    run_parser.add_argument('--timeout', type=float, help='Seconds before a completion request is abandoned.')
+    run_parser.add_argument('--hedge-percentile', type=float,
+                            help='Send a duplicate request once a call exceeds this latency percentile.')
+    run_parser.add_argument('--pack-size', type=int,
+                            help='Answer up to this many prompts in a single numbered completion request.')
+    run_parser.add_argument('--previous',
+                            help='Results of a previous run; only tests whose inputs changed are re-executed.')
+    run_parser.add_argument('--api-key', help='OpenAI API key. Defaults to the OPENAI_API_KEY environment variable.')
+    run_parser.add_argument('--overwrite', action='store_true', help='Overwrite the output file if it exists.')
+    run_parser.set_defaults(func=run)
+
+    merge_parser = subparsers.add_parser('merge', help='Merge shard results into one report.')
+    merge_parser.add_argument('inputs', nargs='+', help='Shard results files.')
+    merge_parser.add_argument('--output', help='Write the combined results to this file.')
+    merge_parser.add_argument('--overwrite', action='store_true', help='Overwrite the output file if it exists.')
+    merge_parser.set_defaults(func=merge)
+
+    return parser
+
+def main(argv=None, qa_model="openai"):
+    """
+    Entry point of the promptops command.
+
+    Parameters:
+    argv (list, optional): Command line arguments. Defaults to sys.argv.
+    qa_model: The model to use for generating responses. Defaults to the OpenAI API;
+        any callable accepted by Test.get_response can be passed instead, e.g. a FakeBackend.
+    """
+    args = build_parser().parse_args(argv)
+    args.func(args, qa_model)
+
+if __name__ == '__main__':
+    main()
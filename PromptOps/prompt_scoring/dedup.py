@@ -0,0 +1,71 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+
+def near_duplicate_clusters(embeddings, threshold=0.95, groups=None, n_planes=12, n_tables=10, seed=0,
+                            chunk_size=1024):
+    """
+    Cluster near-duplicate embeddings with a random-hyperplane LSH index.
+
+    Each table hashes every embedding to the sign pattern of n_planes random projections.
+    Only embeddings sharing a bucket are compared, and pairs whose cosine similarity reaches
+    the threshold are linked. Items are then assigned greedily in index order: an item not yet
+    in a cluster leads a new one and takes every unassigned item linked to it. Every member is
+    therefore within the threshold of its cluster's first item, so similar items cannot chain
+    into one cluster. More tables find more of the borderline pairs; more planes make buckets
+    smaller and faster.
+
+    Parameters:
+    embeddings (ndarray): Unit-length embeddings, one row per item.
+    threshold (float): The cosine similarity at which two items count as duplicates. Defaults to 0.95.
+    groups (list, optional): A label per item; items with different labels are never clustered together.
+    n_planes (int): The number of hyperplanes per hash table. Defaults to 12.
+    n_tables (int): The number of hash tables. Defaults to 10.
+    seed (int): Seed for the random hyperplanes. Defaults to 0.
+    chunk_size (int): The number of rows compared at once within a bucket. Defaults to 1024.
+
+    Returns:
+    list: The clusters as lists of item indices in ascending order, ordered by their first item,
+        which is the item the others were matched against. Items without duplicates form clusters of one.
+    """
+    embeddings = np.asarray(embeddings, dtype=float)
+    count = len(embeddings)
+    if count == 0:
+        return []
+    if groups is not None:
+        _, groups = np.unique([repr(group) for group in groups], return_inverse=True)
+
+    rng = np.random.default_rng(seed)
+    powers = 1 << np.arange(n_planes)
+    sources, targets = [], []
+    for _ in range(n_tables):
+        planes = rng.standard_normal((embeddings.shape[1], n_planes))
+        codes = (embeddings @ planes > 0) @ powers
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        for bucket in np.split(order, boundaries):
+            if len(bucket) < 2:
+                continue
+            for start in range(0, len(bucket), chunk_size):
+                rows = bucket[start:start + chunk_size]
+                i, j = np.nonzero(embeddings[rows] @ embeddings[bucket].T >= threshold)
+                a, b = rows[i], bucket[j]
+                keep = a < b
+                if groups is not None:
+                    keep &= groups[a] == groups[b]
+                sources.append(a[keep])
+                targets.append(b[keep])
+
+    sources = np.concatenate(sources) if sources else np.zeros(0, dtype=int)
+    targets = np.concatenate(targets) if targets else np.zeros(0, dtype=int)
+    links = coo_matrix((np.ones(len(sources)), (sources, targets)), shape=(count, count)).tocsr()
+
+    assigned = np.zeros(count, dtype=bool)
+    clusters = []
+    for leader in range(count):
+        if assigned[leader]:
+            continue
+        linked = links.indices[links.indptr[leader]:links.indptr[leader + 1]]
+        members = np.unique(linked[~assigned[linked]])
+        assigned[members] = True
+        clusters.append([leader, *members.tolist()])
+    return clusters
@@ -0,0 +1,68 @@
+import math
+import random
+import threading
+import time
+
+def lognormal_latency(median, sigma=0.5):
+    """
+    Build a log-normal latency distribution, the usual shape of API response times.
+
+    Parameters:
+    median (float): The median latency in seconds.
+    sigma (float): The spread of the distribution. Defaults to 0.5.
+
+    Returns:
+    callable: A function drawing a latency from a random.Random instance.
+    """
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+def with_stragglers(latency, probability, delay):
+    """
+    Add occasional stuck requests to a latency distribution.
+
+    Parameters:
+    latency (callable): The base distribution.
+    probability (float): The chance that a request is a straggler.
+    delay (float): The latency of a straggler in seconds.
+
+    Returns:
+    callable: A function drawing a latency from a random.Random instance.
+    """
+    return lambda rng: delay if rng.random() < probability else latency(rng)
+
+class FakeBackend:
+    """
+    A local stand-in for a completion API with configurable latency, usable as qa_model.
+    """
+    def __init__(self, latency=0.0, response=None, seed=None):
+        """
+        Initialize a new FakeBackend instance.
+
+        Parameters:
+        latency (float or callable): A fixed latency in seconds, or a function drawing one from a random.Random instance.
+        response (str or callable, optional): The response, or a function of the prompt. Defaults to echoing the prompt.
+        seed (int, optional): Seed for reproducible latencies.
+        """
+        self.latency = latency
+        self.response = response
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, text):
+        """
+        Answer a prompt after sleeping for a latency drawn from the distribution.
+
+        Parameters:
+        text (str): The prompt.
+
+        Returns:
+        str: The response.
+        """
+        with self.lock:
+            self.calls += 1
+            delay = self.latency(self.rng) if callable(self.latency) else self.latency
+        time.sleep(delay)
+        if self.response is None:
+            return text
+        return self.response(text) if callable(self.response) else self.response
@@ -0,0 +1,53 @@
+import re
+
+PACK_INSTRUCTION = (
+    "Answer each of the following {count} questions independently, as if it were asked on its own. "
+    "Reply with exactly {count} answers in order. Start each one on a new line with "
+    "'Answer <number>:' followed by the answer, and write nothing else."
+)
+
+ANSWER_PATTERN = re.compile(r'^[ \t]*Answer[ \t]+(\d+)[ \t]*:', re.MULTILINE)
+
+def pack_prompts(prompts):
+    """
+    Combine several prompts into one numbered multi-question prompt.
+
+    Parameters:
+    prompts (list): The prompts to combine.
+
+    Returns:
+    str: The packed prompt.
+    """
+    questions = "\n\n".join(f"Question {i}:\n{prompt}" for i, prompt in enumerate(prompts, start=1))
+    return PACK_INSTRUCTION.format(count=len(prompts)) + "\n\n" + questions
+
+def parse_packed_response(response, count):
+    """
+    Split the response to a packed prompt into the answers of its questions.
+
+    Parameters:
+    response (str): The response to the prompt built by pack_prompts().
+    count (int): The number of packed questions.
+
+    Returns:
+    list: The answer to each question, in order, or None for questions whose answer is
+        missing, empty or given more than once.
+    """
+    answers = [None] * count
+    if not isinstance(response, str):
+        return answers
+
+    matches = list(ANSWER_PATTERN.finditer(response))
+    seen = set()
+    for i, match in enumerate(matches):
+        number = int(match.group(1))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(response)
+        answer = response[match.end():end].strip()
+        if not 1 <= number <= count:
+            continue
+        if number in seen:
+            answers[number - 1] = None
+            continue
+        seen.add(number)
+        answers[number - 1] = answer or None
+    return answers
@@ -1,11 +1,12 @@
 import random
 
-def perturb(text):
+def perturb(text, seed=None):
     """
     Swap one random character with its neighboring character in the text.
     
     Parameters:
     text (str): The input text to be perturbed.
+    seed (int, optional): Seed for a reproducible perturbation.
 
     Returns:
     str: The perturbed text.
@@ -13,7 +14,8 @@ def perturb(text):
     if len(text) < 2:
         return text
 
-    index = random.randint(0, len(text) - 2)
+    rng = random.Random(seed) if seed is not None else random
+    index = rng.randint(0, len(text) - 2)
     if text[index].isspace() or text[index + 1].isspace():
         return text  
 
@@ -25,3 +27,8 @@ def perturb(text):
     )
 
     return perturbed_text
+
+# Perturbation methods addressable by name, e.g. from a test definition file.
+PERTURB_METHODS = {
+    'perturb': perturb,
+}
@@ -0,0 +1,215 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+def percentile(values, q):
+    """
+    Compute a percentile with linear interpolation between the closest ranks.
+
+    Parameters:
+    values (list): The observed values.
+    q (float): The percentile, between 0 and 100.
+
+    Returns:
+    float: The percentile, or None when there are no values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+class RequestFailure:
+    """
+    The outcome of a request whose every attempt raised an exception.
+    """
+    def __init__(self, error):
+        """
+        Initialize a new RequestFailure instance.
+
+        Parameters:
+        error (Exception): The exception raised by the first failed attempt.
+        """
+        self.error = error
+
+    def __repr__(self):
+        return f"RequestFailure({self.error!r})"
+
+class RequestScheduler:
+    """
+    Run completion requests concurrently with per-request deadlines and hedged duplicates.
+
+    Requests are dispatched largest first, so the long ones do not end up trailing the run.
+    Once a request has been outstanding longer than the hedge_percentile of the latencies
+    observed so far, a duplicate is sent and whichever answers first wins. A request that
+    is still unanswered at its deadline gives None instead of stalling the run, and one whose
+    attempts all raise gives a RequestFailure instead of aborting it.
+
+    Every attempt runs on a thread of its own, so an abandoned attempt that never returns
+    does not hold up the requests after it. The deadline of a request starts when its
+    first attempt does, not when the request is queued.
+    """
+    def __init__(self, max_workers=8, timeout=None, hedge_percentile=95, min_samples=20, longest_first=True):
+        """
+        Initialize a new RequestScheduler instance.
+
+        Parameters:
+        max_workers (int): The number of requests in flight at once, not counting hedges. Defaults to 8.
+        timeout (float, optional): Seconds before a request is abandoned. Also passed to the OpenAI client.
+        hedge_percentile (float, optional): The latency percentile after which a duplicate is sent. None disables hedging.
+        min_samples (int): The number of observed latencies needed before hedging starts. Defaults to 20.
+        longest_first (bool): Whether to dispatch the largest requests first. Defaults to True.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.longest_first = longest_first
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the statistics, which otherwise accumulate over calls to run().
+        """
+        self.latencies = []
+        self.abandoned = []
+        self.requests = 0
+        self.hedged = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def hedge_delay(self):
+        """
+        Get how long a request may be outstanding before it is hedged.
+
+        Returns:
+        float: The delay in seconds, or None while hedging is disabled or there are too few samples.
+        """
+        if self.hedge_percentile is None:
+            return None
+        with self.lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            return percentile(self.latencies, self.hedge_percentile)
+
+    def run(self, tasks):
+        """
+        Run a batch of requests.
+
+        Parameters:
+        tasks (list): (size, function) tuples. size orders the dispatch (e.g. the prompt length)
+            and function is called without arguments to perform the request.
+
+        Returns:
+        list: The result of each task, in order, None for tasks that hit their deadline and
+            a RequestFailure for tasks whose attempts all raised.
+        """
+        order = range(len(tasks))
+        if self.longest_first:
+            order = sorted(order, key=lambda i: tasks[i][0], reverse=True)
+
+        results = [None] * len(tasks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as drivers:
+            futures = [(i, drivers.submit(self.execute, tasks[i][1])) for i in order]
+            for i, future in futures:
+                results[i] = future.result()
+        return results
+
+    @staticmethod
+    def start_attempt(function):
+        """
+        Start one attempt of a request on a thread of its own.
+
+        Attempts cannot be interrupted, so a pool shared by all attempts would fill up with
+        abandoned ones. A daemon thread per attempt is simply left behind instead.
+
+        Parameters:
+        function (callable): The request to perform.
+
+        Returns:
+        Future: The outcome of the attempt.
+        """
+        future = Future()
+
+        def attempt():
+            try:
+                future.set_result(function())
+            except Exception as error:
+                future.set_exception(error)
+
+        threading.Thread(target=attempt, daemon=True).start()
+        return future
+
+    def execute(self, function):
+        """
+        Perform one request, hedging it and enforcing its deadline.
+
+        Parameters:
+        function (callable): The request to perform.
+
+        Returns:
+        The result of the first attempt to succeed, None if the deadline passed, or a
+        RequestFailure if every attempt raised.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout is not None else None
+        pending = {self.start_attempt(function)}
+        hedge_delay = self.hedge_delay()
+        hedge_at = start + hedge_delay if hedge_delay is not None else None
+        error = None
+
+        while pending:
+            wake_times = [t for t in (hedge_at, deadline) if t is not None]
+            timeout = max(min(wake_times) - time.monotonic(), 0) if wake_times else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    with self.lock:
+                        self.requests += 1
+                        self.latencies.append(time.monotonic() - start)
+                    return future.result()
+                error = error or future.exception()
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                with self.lock:
+                    self.requests += 1
+                    self.timeouts += 1
+                    self.abandoned.append(now - start)
+                return None
+            if hedge_at is not None and now >= hedge_at:
+                pending.add(self.start_attempt(function))
+                hedge_at = None
+                with self.lock:
+                    self.hedged += 1
+
+        with self.lock:
+            self.requests += 1
+            self.errors += 1
+        return RequestFailure(error)
+
+    def latency_report(self):
+        """
+        Summarize the latencies observed since the last reset().
+
+        Requests that hit their deadline count with the time at which they were abandoned,
+        a lower bound of their latency, so timeouts show up in the tail instead of hiding it.
+
+        Returns:
+        dict: The number of requests, hedged requests, timeouts and failed requests, and the
+            p50/p95/p99 latency in seconds.
+        """
+        with self.lock:
+            latencies = self.latencies + self.abandoned
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99)
+            }
@@ -0,0 +1,100 @@
+import json
+import os
+import urllib.request
+
+# Environment variable pointing the scoring functions at a running scoring server.
+SCORING_URL_ENV = "PROMPTOPS_SCORING_URL"
+
+class ScoringClient:
+    """
+    A client for the local scoring server started with `python -m PromptOps.prompt_scoring.scoring_server`.
+    """
+    def __init__(self, url, timeout=60):
+        """
+        Initialize a new ScoringClient instance.
+
+        Parameters:
+        url (str): The base URL of the server, e.g. 'http://127.0.0.1:8765'.
+        timeout (float): Seconds to wait for a response. Defaults to 60.
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def post(self, path, payload):
+        """
+        Send a JSON request to the server.
+
+        Parameters:
+        path (str): The endpoint path.
+        payload (dict): The request body.
+
+        Returns:
+        dict: The decoded response body.
+        """
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def similarity(self, pairs):
+        """
+        Compute the cosine similarity of text pairs on the server.
+
+        Parameters:
+        pairs (list): A list of (text1, text2) tuples.
+
+        Returns:
+        list: The similarity score of each pair, in order.
+        """
+        if not pairs:
+            return []
+        return self.post('/similarity', {'pairs': [list(pair) for pair in pairs]})['scores']
+
+    def encode(self, texts):
+        """
+        Compute normalized embeddings on the server.
+
+        Parameters:
+        texts (list): The texts to embed.
+
+        Returns:
+        list: The embedding of each text, as a list of floats.
+        """
+        if not texts:
+            return []
+        return self.post('/encode', {'texts': list(texts)})['embeddings']
+
+def client_from_env():
+    """
+    Create a client for the server named by the PROMPTOPS_SCORING_URL environment variable.
+
+    Returns:
+    ScoringClient: The client, or None when the variable is not set.
+    """
+    url = os.getenv(SCORING_URL_ENV)
+    return ScoringClient(url) if url else None
+
+# The client shared by every scoring function, so switching servers affects them all at once.
+shared_client = client_from_env()
+
+def get_scoring_client():
+    """
+    Get the client of the scoring server currently in use.
+
+    Returns:
+    ScoringClient: The shared client, or None when scoring locally.
+    """
+    return shared_client
+
+def set_scoring_client(client):
+    """
+    Replace the shared client.
+
+    Parameters:
+    client (ScoringClient): The new client, or None to score locally.
+    """
+    global shared_client
+    shared_client = client
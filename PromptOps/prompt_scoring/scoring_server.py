@@ -0,0 +1,270 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+# Request kind, payload key and response key of each POST endpoint.
+ENDPOINTS = {
+    '/similarity': ('similarity', 'pairs', 'scores'),
+    '/encode': ('encode', 'texts', 'embeddings'),
+}
+
+def validate_payload(kind, payload):
+    """
+    Check the shape of a request payload before it joins a batch shared with other clients.
+    Raises ValueError if the payload is not a list of text pairs or texts.
+
+    Parameters:
+    kind (str): 'similarity' or 'encode'.
+    payload: The decoded pairs or texts.
+    """
+    if not isinstance(payload, list):
+        raise ValueError(f"Expected a list of {'pairs' if kind == 'similarity' else 'texts'}.")
+    for item in payload:
+        if kind == 'similarity':
+            if not isinstance(item, list) or len(item) != 2:
+                raise ValueError("Each pair must be a list of two texts.")
+            texts = item
+        else:
+            texts = [item]
+        if not all(isinstance(text, str) for text in texts):
+            raise ValueError("Texts must be strings.")
+
+class ScoringRequest:
+    """
+    A pending similarity or encode request waiting for its micro-batch.
+    """
+    def __init__(self, kind, payload):
+        """
+        Initialize a new ScoringRequest instance.
+
+        Parameters:
+        kind (str): 'similarity' for a list of text pairs, 'encode' for a list of texts.
+        payload (list): The pairs or texts.
+        """
+        self.kind = kind
+        self.payload = payload
+        self.texts = [text for pair in payload for text in pair] if kind == 'similarity' else list(payload)
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """
+    Merge concurrent scoring requests into micro-batches for a single warm model.
+
+    A batch is closed when it holds max_batch_size texts or when its first request has
+    waited max_wait seconds, whichever comes first. Each distinct text in a batch is
+    embedded once.
+    """
+    def __init__(self, model, max_batch_size=128, max_wait=0.01):
+        """
+        Initialize a new MicroBatcher instance and start its worker thread.
+
+        Parameters:
+        model (SentenceTransformer): The model to use for generating embeddings.
+        max_batch_size (int): The number of texts that closes a batch. Defaults to 128.
+        max_wait (float): Seconds a request may wait for others to join its batch. Defaults to 0.01.
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        threading.Thread(target=self.loop, daemon=True).start()
+
+    def submit(self, kind, payload):
+        """
+        Queue a request and wait for its batch to be processed.
+
+        Parameters:
+        kind (str): 'similarity' or 'encode'.
+        payload (list): The pairs or texts.
+
+        Returns:
+        list: The similarity scores or the embeddings.
+        """
+        request = ScoringRequest(kind, payload)
+        self.queue.put(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def loop(self):
+        """
+        Collect requests into batches and process them, forever.
+        """
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            self.process(batch)
+
+    def process(self, batch):
+        """
+        Answer the requests of a batch, falling back to one request at a time if the batch fails.
+
+        Parameters:
+        batch (list): The ScoringRequest instances to answer.
+        """
+        try:
+            self.answer(batch)
+        except Exception:
+            # Isolate the failing request instead of failing every client in the batch.
+            for request in batch:
+                try:
+                    self.answer([request])
+                except Exception as error:
+                    request.error = error
+        with self.lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += sum(len(request.texts) for request in batch)
+        for request in batch:
+            request.done.set()
+
+    def answer(self, batch):
+        """
+        Embed the distinct texts of a batch once and store the result of each of its requests.
+
+        Parameters:
+        batch (list): The ScoringRequest instances to answer.
+        """
+        texts = list(dict.fromkeys(text for request in batch for text in request.texts))
+        index = {text: i for i, text in enumerate(texts)}
+        embeddings = self.model.encode(texts, batch_size=self.max_batch_size, normalize_embeddings=True)
+        for request in batch:
+            if request.kind == 'similarity':
+                emb_a = embeddings[[index[a] for a, _ in request.payload]]
+                emb_b = embeddings[[index[b] for _, b in request.payload]]
+                request.result = np.einsum('ij,ij->i', emb_a, emb_b).tolist()
+            else:
+                request.result = embeddings[[index[text] for text in request.texts]].tolist()
+
+    def stats(self):
+        """
+        Get the batching statistics since startup.
+
+        Returns:
+        dict: The number of batches, requests and texts, and the mean requests per batch.
+        """
+        with self.lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'texts': self.texts,
+                'requests_per_batch': self.requests / self.batches if self.batches else 0
+            }
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """
+    HTTP endpoints of the scoring server: POST /similarity, POST /encode and GET /stats.
+    """
+    def send_json(self, status, body):
+        """
+        Send a JSON response.
+        """
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        """
+        Report the batching statistics.
+        """
+        if self.path == '/stats':
+            self.send_json(200, self.server.batcher.stats())
+        else:
+            self.send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        """
+        Answer a similarity or encode request through the micro-batcher.
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length)
+        if self.path not in ENDPOINTS:
+            self.send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+            return
+
+        kind, key, result_key = ENDPOINTS[self.path]
+        # Reject malformed requests here, before they can join a batch with other clients' requests.
+        try:
+            body = json.loads(data or b'{}')
+            if not isinstance(body, dict) or key not in body:
+                raise ValueError(f"Missing '{key}'.")
+            validate_payload(kind, body[key])
+        except ValueError as error:
+            self.send_json(400, {'error': str(error)})
+            return
+
+        try:
+            self.send_json(200, {result_key: self.server.batcher.submit(kind, body[key])})
+        except Exception as error:
+            self.send_json(500, {'error': str(error)})
+
+    def log_message(self, format, *args):
+        # One line per scoring request would drown the output of a busy server.
+        pass
+
+def serve(model_name="all-mpnet-base-v2", host='127.0.0.1', port=8765, max_batch_size=128, max_wait=0.01):
+    """
+    Load the model once and serve scoring requests until interrupted.
+
+    Parameters:
+    model_name (str): The SentenceTransformer model to keep warm.
+    host (str): The address to bind. Defaults to localhost only.
+    port (int): The port to listen on. Defaults to 8765.
+    max_batch_size (int): The number of texts that closes a micro-batch. Defaults to 128.
+    max_wait (float): Seconds a request may wait for others to join its batch. Defaults to 0.01.
+    """
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    server.batcher = MicroBatcher(SentenceTransformer(model_name), max_batch_size, max_wait)
+    print(f"Scoring server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    """
+    Entry point of `python -m PromptOps.prompt_scoring.scoring_server`.
+
+    Parameters:
+    argv (list, optional): Command line arguments. Defaults to sys.argv.
+    """
+    parser = argparse.ArgumentParser(description='Serve warm, micro-batched similarity scoring.')
+    parser.add_argument('--model', default='all-mpnet-base-v2', help='The SentenceTransformer model to load.')
+    parser.add_argument('--host', default='127.0.0.1', help='The address to bind.')
+    parser.add_argument('--port', type=int, default=8765, help='The port to listen on.')
+    parser.add_argument('--max-batch-size', type=int, default=128, help='Texts per micro-batch.')
+    parser.add_argument('--max-wait', type=float, default=0.01,
+                        help='Seconds a request may wait for others to join its batch.')
+    args = parser.parse_args(argv)
+    serve(args.model, args.host, args.port, args.max_batch_size, args.max_wait)
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,37 @@
+import hashlib
+import json
+from functools import partial
+import numpy as np
 import openai
 from sentence_transformers import SentenceTransformer
+from .scoring_client import ScoringClient, get_scoring_client, set_scoring_client
+
+# Use a running scoring server when PROMPTOPS_SCORING_URL is set, so this process
+# does not load its own copy of the model.
 
 # Initialize the sentence transformer model
-similarity_model = SentenceTransformer("all-mpnet-base-v2")
+SIMILARITY_MODEL_NAME = "all-mpnet-base-v2"
+similarity_model = SentenceTransformer(SIMILARITY_MODEL_NAME) if get_scoring_client() is None else None
+
+def set_scoring_server(url):
+    """
+    Route similarity scoring through a scoring server, or back to the local model.
+    
+    Parameters:
+    url (str): The base URL of the server, or None to score locally.
+    """
+    global similarity_model
+    set_scoring_client(ScoringClient(url) if url else None)
+    if get_scoring_client() is None and similarity_model is None:
+        similarity_model = SentenceTransformer(SIMILARITY_MODEL_NAME)
+
+def use_scoring_server(model):
+    """
+    Check whether scoring with the given model should go to the scoring server.
+    
+    Only the shared similarity model is served; an explicitly passed custom model is used locally.
+    """
+    return get_scoring_client() is not None and (model is None or model is similarity_model)
 
 def evaluate_response(text1, text2, model):
     """
@@ -16,12 +45,99 @@ def evaluate_response(text1, text2, model):
     Returns:
     float: The similarity score between the two texts.
     """
+    if use_scoring_server(model):
+        return get_scoring_client().similarity([(text1, text2)])[0]
     emb_a = model.encode([text1])
     emb_b = model.encode([text2])
     similarities = model.similarity(emb_a, emb_b)
     return similarities.item()
 
-def get_completion(prompt: str, model_name: str, system_message: str):
+def batch_similarity(pairs, model=None):
+    """
+    Compute the cosine similarity of many text pairs with a single batched encode.
+
+    Each distinct text is embedded once, so repeated expected results cost nothing extra.
+
+    Parameters:
+    pairs (list): A list of (text1, text2) tuples.
+    model (SentenceTransformer, optional): The model to use for generating embeddings. Defaults to the shared similarity model.
+
+    Returns:
+    list: The similarity score of each pair, in order.
+    """
+    if not pairs:
+        return []
+    if use_scoring_server(model):
+        return get_scoring_client().similarity(pairs)
+    texts = list(dict.fromkeys(text for pair in pairs for text in pair))
+    index = {text: i for i, text in enumerate(texts)}
+    embeddings = encode_texts(texts, model)
+    emb_a = embeddings[[index[a] for a, _ in pairs]]
+    emb_b = embeddings[[index[b] for _, b in pairs]]
+    return np.einsum('ij,ij->i', emb_a, emb_b).tolist()
+
+def encode_texts(texts, model=None):
+    """
+    Compute normalized embeddings for many texts in one batch.
+    
+    Parameters:
+    texts (list): The texts to embed.
+    model (SentenceTransformer, optional): The model to use. Defaults to the shared similarity model.
+    
+    Returns:
+    ndarray: One unit-length embedding per text.
+    """
+    if use_scoring_server(model):
+        return np.asarray(get_scoring_client().encode(texts), dtype=float)
+    if model is None:
+        model = similarity_model
+    return model.encode(list(texts), normalize_embeddings=True)
+
+def scorer_name(scorer=None):
+    """
+    Identify the scoring configuration, for change detection between runs.
+    
+    Parameters:
+    scorer (CascadeScorer, optional): The scorer in use. None means the embedding model alone.
+    
+    Returns:
+    str: The scorer identifier.
+    """
+    return SIMILARITY_MODEL_NAME if scorer is None else scorer.name
+
+def callable_name(function):
+    """
+    Name a callable in a way that identifies it across runs.
+    
+    Parameters:
+    function (callable): The callable, e.g. a perturb_method.
+    
+    Returns:
+    str: 'module.qualname', followed by the bound arguments for a functools.partial, or None
+        for lambdas, local functions and callable objects, which have no stable name.
+    """
+    if isinstance(function, partial):
+        name = callable_name(function.func)
+        if name is None:
+            return None
+        return f"{name}(*{function.args!r}, **{sorted(function.keywords.items())!r})"
+    qualname = getattr(function, '__qualname__', None)
+    module = getattr(function, '__module__', None)
+    if qualname is None or module is None or '<' in qualname:
+        return None
+    return f"{module}.{qualname}"
+
+def content_hash(*values):
+    """
+    Hash a sequence of JSON-serializable values.
+    
+    Returns:
+    str: The hex digest of the values.
+    """
+    payload = json.dumps(values, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def get_completion(prompt: str, model_name: str, system_message: str, request_timeout=None):
     """
     Get the completion from the OpenAI API.
     
@@ -29,6 +145,7 @@ def get_completion(prompt: str, model_name: str, system_message: str):
     prompt (str): The user prompt.
     model_name (str): The name of the OpenAI model to use.
     system_message (str): The system message providing context for the model.
+    request_timeout (float, optional): Seconds to wait for the API before giving up.
     
     Returns:
     str: The generated response from the model.
@@ -40,7 +157,8 @@ def get_completion(prompt: str, model_name: str, system_message: str):
             {"role": "user", "content": prompt}
         ],
         temperature=0,
-        top_p=0
+        top_p=0,
+        request_timeout=request_timeout
     )
     return response.choices[0].message.content.strip()
 
@@ -50,7 +168,7 @@ class Test:
     """
     def __init__(self, name, prompt, expected_result, description=None,
                  perturb_method=None, perturb_text=None, capability=None,
-                 pass_condition="increase"):
+                 pass_condition="increase", perturb_seed=None, weight=1):
         """
         Initialize a new Test instance.
         
@@ -63,6 +181,8 @@ class Test:
         perturb_text (str, optional): The perturbed text.
         capability (str, optional): The capability being tested.
         pass_condition (str, optional): The condition to pass the test ('increase' or 'decrease').
+        perturb_seed (int, optional): Seed passed to perturb_method for a reproducible perturbation.
+        weight (float, optional): How many tests this one stands for, e.g. after deduplication.
         """
         self.name = name
         self.description = description
@@ -72,13 +192,20 @@ class Test:
         self.perturb_text = perturb_text
         self.capability = capability
         self.pass_condition = pass_condition
+        self.perturb_seed = perturb_seed
+        self.weight = weight
         self.original_response = None
         self.perturb_response = None
         self.score_original = None
         self.score_perturb = None
+        self.stage_original = None
+        self.stage_perturb = None
         self.model_name = None  
+        self.generation_hash = None
+        self.input_hash = None
+        self.error = None
 
-    def run(self, qa_model, model_name, system_message):
+    def run(self, qa_model, model_name, system_message, scorer=None):
         """
         Run the test case by generating and evaluating the responses.
         
@@ -86,19 +213,159 @@ class Test:
         qa_model (str): The QA model to use.
         model_name (str): The name of the model.
         system_message (str): The system message providing context for the model.
+        scorer (CascadeScorer, optional): The scorer to use instead of the embedding model alone.
+        """
+        self.set_hashes(model_name, system_message, scorer)
+        self.generate(qa_model, model_name, system_message)
+        self.score(scorer)
+
+    def set_hashes(self, model_name, system_message, scorer=None, pack_size=None):
+        """
+        Hash the inputs of this test so a later run can tell whether it needs re-executing.
+        
+        generation_hash covers everything that determines the responses; input_hash additionally
+        covers the expected result and the scorer, which only affect the scores.
+        
+        A perturb_method without a stable name (see callable_name) is identified by the perturbed
+        text it produces when perturb_seed makes it deterministic. Otherwise nothing identifies
+        it across runs, so both hashes are None and the test is always re-executed.
+        
+        Parameters:
+        model_name (str): The name of the model.
+        system_message (str): The system message providing context for the model.
+        scorer (CascadeScorer, optional): The scorer in use.
+        pack_size (int, optional): The pack size the responses are generated with.
+        """
+        method_name, perturb_seed, perturb_text = self.perturbation_key()
+        if self.perturb_method and callable_name(self.perturb_method) is None:
+            if perturb_seed is None:
+                self.generation_hash = self.input_hash = None
+                return
+            method_name, perturb_text = None, self.perturbed_prompt()
+        generation = [self.prompt, method_name, perturb_seed, perturb_text, model_name, system_message]
+        if pack_size and pack_size > 1:
+            # Answers to packed prompts are not interchangeable with individual answers.
+            generation.append(pack_size)
+        self.generation_hash = content_hash(*generation)
+        self.input_hash = content_hash(self.generation_hash, self.expected_result, scorer_name(scorer))
+
+    def perturbation_key(self):
+        """
+        Identify how the perturbed prompt of this test is produced.
+        
+        Tests sharing a perturb_method object share its key; a method without a stable name
+        is told apart from other methods by its identity, which only holds within this process.
+        
+        Returns:
+        tuple: The name of perturb_method, perturb_seed and, when no method generates it,
+            the fixed perturb_text.
+        """
+        method = self.perturb_method
+        method_name = None
+        if method:
+            method_name = callable_name(method) or f"{type(method).__name__}@{id(method):x}"
+        # A fixed perturb_text is an input only when no method generates it.
+        perturb_text = None if method else self.perturb_text
+        return method_name, self.perturb_seed, perturb_text
+
+    def generate(self, qa_model, model_name, system_message, perturb=True):
+        """
+        Generate the original and perturbed responses without scoring them.
+        
+        Parameters:
+        qa_model (str): The QA model to use.
+        model_name (str): The name of the model.
+        system_message (str): The system message providing context for the model.
+        perturb (bool): Whether to apply perturb_method first, or keep the current perturb_text.
         """
         self.model_name = model_name  
+        self.error = None
         self.original_response = self.get_response(qa_model, self.prompt, model_name, system_message)
-        if self.perturb_method:
-            self.perturb_text = self.perturb_method(self.prompt)
+        if perturb:
+            self.apply_perturbation()
         self.perturb_response = self.get_response(qa_model, self.perturb_text, model_name, system_message)
 
+    def apply_perturbation(self):
+        """
+        Set perturb_text by applying perturb_method to the prompt, if a method is given.
+        """
+        if self.perturb_method:
+            self.perturb_text = self.perturbed_prompt()
+
+    def perturbed_prompt(self):
+        """
+        Apply perturb_method to the prompt without storing the result.
+        
+        Returns:
+        str: The perturbed prompt.
+        """
+        if self.perturb_seed is not None:
+            return self.perturb_method(self.prompt, seed=self.perturb_seed)
+        return self.perturb_method(self.prompt)
+
+    def score(self, scorer=None):
+        """
+        Score the generated responses against the expected result.
+        
+        Parameters:
+        scorer (CascadeScorer, optional): The scorer to use. Defaults to the embedding model alone.
+        """
+        if scorer is not None:
+            pairs = self.score_pairs()
+            self.set_scores(*scorer.score(pairs, [0] * len(pairs)))
+            return
+
         if self.original_response:
             self.score_original = self.evaluate(similarity_model, self.original_response)
+            self.stage_original = 'embedding'
         if self.perturb_response:
             self.score_perturb = self.evaluate(similarity_model, self.perturb_response)
+            self.stage_perturb = 'embedding'
 
-    def get_response(self, qa_model, text, model_name, system_message):
+    def score_pairs(self):
+        """
+        Get the (response, expected result) pairs that need scoring.
+        
+        Returns:
+        list: One pair for each non-empty response, original first.
+        """
+        return [(response, self.expected_result)
+                for response in (self.original_response, self.perturb_response) if response]
+
+    def set_scores(self, scores, stages):
+        """
+        Store the scores computed for the pairs returned by score_pairs().
+        
+        Parameters:
+        scores (list): The score of each pair, in order.
+        stages (list): The scoring stage that produced each score, in order.
+        """
+        results = iter(zip(scores, stages))
+        if self.original_response:
+            self.score_original, self.stage_original = next(results)
+        if self.perturb_response:
+            self.score_perturb, self.stage_perturb = next(results)
+
+    def restore(self, result, scores=True):
+        """
+        Reuse the outcome of a previous run instead of re-executing the test.
+        
+        Parameters:
+        result (dict): The result of this test from a previous run, as returned by summarize().
+        scores (bool): Whether to restore the scores too, or only the responses.
+        """
+        self.model_name = result['model_name']
+        self.perturb_text = result['perturb_text']
+        self.original_response = result['response_original']
+        self.perturb_response = result['response_perturb']
+        self.error = result.get('error')
+        if scores:
+            self.score_original = result['score_original']
+            self.score_perturb = result['score_perturb']
+            self.stage_original = result.get('stage_original')
+            self.stage_perturb = result.get('stage_perturb')
+
+    def get_response(self, qa_model, text, model_name, system_message, request_timeout=None):
         """
         Get the response from the OpenAI API or another model.
         
@@ -107,6 +374,7 @@ class Test:
         text (str): The text to get a response for.
         model_name (str): The name of the model.
         system_message (str): The system message providing context for the model.
+        request_timeout (float, optional): Seconds to wait for the OpenAI API before giving up.
         
         Returns:
         str: The generated response.
@@ -115,7 +383,7 @@ class Test:
             return None
 
         if qa_model == "openai":
-            result = get_completion(text, model_name, system_message)
+            result = get_completion(text, model_name, system_message, request_timeout)
         else:
             result = qa_model(text)
 
@@ -142,10 +410,13 @@ class Test:
         """
         Summarize the test case and return all results.
         
+        A test whose responses could not be generated, e.g. because a request hit its
+        deadline, counts as failed.
+        
         Returns:
         dict: A dictionary summarizing the test case results.
         """
-        fail = False
+        fail = self.error is not None
         if self.score_original is not None and self.score_perturb is not None:
             if self.pass_condition == "decrease":
                 if self.score_perturb >= self.score_original:
@@ -166,6 +437,13 @@ class Test:
             'response_perturb': self.perturb_response,
             'score_original': self.score_original,
             'score_perturb': self.score_perturb,
+            'stage_original': self.stage_original,
+            'stage_perturb': self.stage_perturb,
             'fail': fail,
-            'model_name': self.model_name  
+            'error': self.error,
+            'model_name': self.model_name,
+            'perturb_seed': self.perturb_seed,
+            'weight': self.weight,
+            'generation_hash': self.generation_hash,
+            'input_hash': self.input_hash
         }
@@ -1,7 +1,272 @@
+import copy
 import os
 import pickle
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import combinations
 import pandas as pd
-from .test import Test
+from .test import Test, batch_similarity, encode_texts
+from .perturb import PERTURB_METHODS
+from .packing import pack_prompts, parse_packed_response
+from .analytics import GROUP_KEYS, analyze
+from .scheduler import RequestFailure
+from .dedup import near_duplicate_clusters
+
+# Columns of a test definition file that map onto Test constructor arguments.
+TEST_FIELDS = ['name', 'prompt', 'expected_result', 'description',
+               'perturb_method', 'perturb_text', 'capability', 'pass_condition', 'perturb_seed', 'weight']
+
+def summarize_results(results):
+    """
+    Compute the suite-level summary for a list of per-test results.
+
+    Parameters:
+    results (list): A list of dictionaries as returned by Test.summarize().
+
+    Returns:
+    dict: The total number of tests, number of failures, failure rate, failure rate
+        weighted by each test's weight, number of tests that errored (and therefore
+        count as failures), and the share of scores produced by each scoring stage.
+    """
+    total_tests = len(results)
+    failure_count = sum(1 for result in results if result['fail'])
+    error_count = sum(1 for result in results if result.get('error'))
+    fail_rate = (failure_count / total_tests) * 100 if total_tests > 0 else 0
+
+    # Tests kept as representatives of deduplicated clusters stand for the whole cluster.
+    weights = [result.get('weight') or 1 for result in results]
+    total_weight = sum(weights)
+    failed_weight = sum(weight for weight, result in zip(weights, results) if result['fail'])
+    weighted_fail_rate = (failed_weight / total_weight) * 100 if total_weight > 0 else 0
+
+    stages = [result.get(key) for result in results for key in ('stage_original', 'stage_perturb')]
+    stages = [stage for stage in stages if stage is not None]
+    stage_hit_rates = {stage: stages.count(stage) / len(stages) for stage in dict.fromkeys(stages)}
+    return {
+        'total_tests': total_tests,
+        'failures': failure_count,
+        'fail_rate': fail_rate,
+        'weighted_fail_rate': weighted_fail_rate,
+        'errors': error_count,
+        'stage_hit_rates': stage_hit_rates
+    }
+
+def run_tasks(tasks, max_workers=1, scheduler=None):
+    """
+    Run (size, function) request tasks through a scheduler or a plain thread pool.
+
+    Parameters:
+    tasks (list): (size, function) tuples, as accepted by RequestScheduler.run().
+    max_workers (int): The number of tasks to run concurrently when no scheduler is given. Defaults to 1.
+    scheduler (RequestScheduler, optional): The scheduler to use.
+
+    Returns:
+    list: The result of each task, in order. A task that raises gives a RequestFailure, so one
+        failed request does not discard the others.
+    """
+    if scheduler is not None:
+        return scheduler.run(tasks)
+
+    def call(task):
+        try:
+            return task[1]()
+        except Exception as error:
+            return RequestFailure(error)
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        return list(executor.map(call, tasks))
+
+def generate_responses(jobs, qa_model, system_message, max_workers=1, scheduler=None, perturb=True,
+                       pack_size=None):
+    """
+    Generate the responses of many tests without scoring them.
+
+    Parameters:
+    jobs (list): (test, model_name) tuples.
+    qa_model: The model to use for generating responses.
+    system_message (str): A message providing context for the model.
+    max_workers (int): The number of requests to run concurrently when no scheduler is given. Defaults to 1.
+    scheduler (RequestScheduler, optional): Send the completion requests through this scheduler.
+    perturb (bool): Whether to apply each test's perturb_method first, or keep its current perturb_text.
+    pack_size (int, optional): Answer up to this many prompts of the same model in one numbered
+        multi-question request. Original and perturbed prompts are packed separately, so a
+        test's two prompts are never seen side by side. Prompts whose answer cannot be parsed
+        are sent individually.
+
+    Tests with a request that hit the scheduler's deadline get error 'timeout'; tests with a
+    request that raised get the name of the exception type as their error.
+
+    Returns:
+    dict: The number of completions needed, the number of requests made, the mean number of
+        prompts per packed request, the number of fallbacks and the reduction in request count.
+    """
+    requests = []
+    for test, model_name in jobs:
+        test.model_name = model_name
+        if perturb:
+            test.apply_perturbation()
+        test.original_response = test.perturb_response = None
+        test.score_original = test.score_perturb = test.stage_original = test.stage_perturb = None
+        test.error = None
+        for field, text in (('original_response', test.prompt), ('perturb_response', test.perturb_text)):
+            if text:
+                requests.append((test, field, text, model_name))
+
+    if scheduler is not None:
+        scheduler.reset()
+    timeout = scheduler.timeout if scheduler is not None else None
+
+    packs, remaining, fallbacks = [], requests, 0
+    if pack_size and pack_size > 1:
+        groups = {}
+        for request in requests:
+            groups.setdefault((request[3], request[1]), []).append(request)
+        chunks = [group[i:i + pack_size] for group in groups.values() for i in range(0, len(group), pack_size)]
+        packs = [chunk for chunk in chunks if len(chunk) > 1]
+        remaining = [chunk[0] for chunk in chunks if len(chunk) == 1]
+
+        tasks = [(sum(len(request[2]) for request in pack),
+                  partial(pack[0][0].get_response, qa_model, pack_prompts([request[2] for request in pack]),
+                          pack[0][3], system_message, timeout))
+                 for pack in packs]
+        for pack, response in zip(packs, run_tasks(tasks, max_workers, scheduler)):
+            for request, answer in zip(pack, parse_packed_response(response, len(pack))):
+                if answer is None:
+                    remaining.append(request)
+                    fallbacks += 1
+                else:
+                    setattr(request[0], request[1], answer)
+
+    tasks = [(len(text), partial(test.get_response, qa_model, text, model_name, system_message, timeout))
+             for test, field, text, model_name in remaining]
+    for (test, field, _, _), response in zip(remaining, run_tasks(tasks, max_workers, scheduler)):
+        if isinstance(response, RequestFailure):
+            test.error = type(response.error).__name__
+            response = None
+        elif response is None and timeout is not None:
+            test.error = 'timeout'
+        setattr(test, field, response)
+
+    request_count = len(packs) + len(remaining)
+    packed_items = sum(len(pack) for pack in packs)
+    return {
+        'completions': len(requests),
+        'requests': request_count,
+        'mean_pack_size': packed_items / len(packs) if packs else 0,
+        'fallbacks': fallbacks,
+        'request_reduction': 1 - request_count / len(requests) if requests else 0
+    }
+
+def check_unique_names(names, source):
+    """
+    Make sure no two tests share a name, for operations that match tests up by name.
+
+    Parameters:
+    names (iterable): The test names.
+    source (str): What the names belong to, for the error message.
+    """
+    seen, duplicates = set(), []
+    for name in names:
+        if name in seen and name not in duplicates:
+            duplicates.append(name)
+        seen.add(name)
+    if duplicates:
+        raise ValueError(f"Test names must be unique in {source}; duplicated: {', '.join(map(str, duplicates))}")
+
+def diff_results(previous_results, results):
+    """
+    Compare the per-test results of two runs by test name. Names must be unique within each run.
+
+    Parameters:
+    previous_results (list): The results of the earlier run.
+    results (list): The results of the later run.
+
+    Returns:
+    dict: The names of added, removed, changed and unchanged tests, of tests that
+        started failing or passing, and the score changes of tests present in both runs.
+    """
+    check_unique_names((result['name'] for result in previous_results), 'the previous results')
+    check_unique_names((result['name'] for result in results), 'the results')
+    previous = {result['name']: result for result in previous_results}
+    current = {result['name']: result for result in results}
+    diff = {
+        'added': [name for name in current if name not in previous],
+        'removed': [name for name in previous if name not in current],
+        'changed': [],
+        'unchanged': [],
+        'newly_failing': [],
+        'newly_passing': [],
+        'score_changes': []
+    }
+    for name, result in current.items():
+        if name not in previous:
+            continue
+        before = previous[name]
+        # Tests without an input hash cannot be compared, so they count as changed.
+        if result['input_hash'] is not None and before.get('input_hash') == result['input_hash']:
+            diff['unchanged'].append(name)
+        else:
+            diff['changed'].append(name)
+        if result['fail'] and not before['fail']:
+            diff['newly_failing'].append(name)
+        elif before['fail'] and not result['fail']:
+            diff['newly_passing'].append(name)
+        for key in ('score_original', 'score_perturb'):
+            if before[key] != result[key]:
+                diff['score_changes'].append({'name': name, 'score': key,
+                                              'before': before[key], 'after': result[key]})
+    return diff
+
+def read_table(filename):
+    """
+    Read a CSV, JSONL or Parquet file into a DataFrame based on its extension.
+
+    Parameters:
+    filename (str): The file to read.
+
+    Returns:
+    DataFrame: The file contents.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(filename)
+    elif extension in ('.jsonl', '.ndjson'):
+        return pd.read_json(filename, lines=True)
+    elif extension == '.parquet':
+        return pd.read_parquet(filename)
+    raise ValueError(f"Unsupported file format: {extension}")
+
+def write_table(df, filename):
+    """
+    Write a DataFrame to a CSV, JSONL or Parquet file based on its extension.
+
+    Parameters:
+    df (DataFrame): The data to write.
+    filename (str): The file to write to.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        df.to_csv(filename, index=False)
+    elif extension in ('.jsonl', '.ndjson'):
+        df.to_json(filename, orient='records', lines=True)
+    elif extension == '.parquet':
+        df.to_parquet(filename, index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+
+def load_results(filename):
+    """
+    Load per-test results previously written by TestSuite.export_results or the CLI.
+
+    Parameters:
+    filename (str): The results file (CSV, JSONL or Parquet).
+
+    Returns:
+    list: A list of result dictionaries, with missing values as None.
+    """
+    df = read_table(filename)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
 
 class TestSuite:
     def __init__(self):
@@ -20,7 +285,65 @@ class TestSuite:
         """
         self.tests.append(test)
 
-    def run_all(self, qa_model, model_name, system_message):
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a test suite from test definitions.
+
+        Parameters:
+        records (iterable): Dictionaries with keys from TEST_FIELDS. 'name', 'prompt' and
+            'expected_result' are required; 'perturb_method' may name an entry of PERTURB_METHODS.
+
+        Returns:
+        TestSuite: A suite holding one Test per record.
+        """
+        suite = cls()
+        for record in records:
+            # Rows read from a table hold NaN for empty cells; leave those to the Test defaults.
+            kwargs = {field: record[field] for field in TEST_FIELDS
+                      if field in record and not pd.isna(record[field])}
+            method = kwargs.get('perturb_method')
+            if isinstance(method, str):
+                if method not in PERTURB_METHODS:
+                    raise ValueError(f"Unknown perturb method: {method}")
+                kwargs['perturb_method'] = PERTURB_METHODS[method]
+            if 'perturb_seed' in kwargs:
+                kwargs['perturb_seed'] = int(kwargs['perturb_seed'])
+            suite.add_test(Test(**kwargs))
+        return suite
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Build a test suite from a CSV, JSONL or Parquet file of test definitions.
+
+        Parameters:
+        filename (str): The file holding one test definition per row.
+
+        Returns:
+        TestSuite: The loaded test suite.
+        """
+        return cls.from_records(read_table(filename).to_dict('records'))
+
+    def shard(self, index, count):
+        """
+        Select a deterministic slice of the suite for multi-node execution.
+
+        Parameters:
+        index (int): The 1-based shard number.
+        count (int): The total number of shards.
+
+        Returns:
+        TestSuite: A new suite holding every count-th test, starting at position index - 1.
+        """
+        if count < 1 or not 1 <= index <= count:
+            raise ValueError(f"Invalid shard {index}/{count}")
+        suite = TestSuite()
+        suite.tests = self.tests[index - 1::count]
+        return suite
+
+    def run_all(self, qa_model, model_name, system_message, max_workers=1, scorer=None, scheduler=None,
+                pack_size=None):
         """
         Run all test cases in the suite.
 
@@ -28,10 +351,182 @@ class TestSuite:
         qa_model: The model to use for generating responses.
         model_name (str): The name of the model.
         system_message (str): A message providing context for the model.
+        max_workers (int): The number of tests to run concurrently. Defaults to 1.
+        scorer (CascadeScorer, optional): Score all responses in one batch through this scorer
+            once every response has been generated, instead of one embedding pass per response.
+        scheduler (RequestScheduler, optional): Send the completion requests through this scheduler,
+            which then sets the concurrency. Its latency report is kept in self.latency_report.
+        pack_size (int, optional): Answer up to this many prompts in one numbered multi-question request.
+            The achieved pack size and request reduction are kept in self.packing_report.
         """
         self.model_name = model_name
+        if scorer is None and scheduler is None and pack_size is None:
+            if max_workers <= 1:
+                for test in self.tests:
+                    test.run(qa_model, model_name, system_message)
+                return
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(test.run, qa_model, model_name, system_message)
+                           for test in self.tests]
+                for future in futures:
+                    future.result()
+            return
+
         for test in self.tests:
-            test.run(qa_model, model_name, system_message)
+            test.set_hashes(model_name, system_message, scorer, pack_size)
+        packing_report = generate_responses([(test, model_name) for test in self.tests], qa_model,
+                                            system_message, max_workers=max_workers, scheduler=scheduler,
+                                            pack_size=pack_size)
+        if pack_size is not None:
+            self.packing_report = packing_report
+        if scheduler is not None:
+            self.latency_report = scheduler.latency_report()
+        self.score_all(scorer)
+
+    def rerun(self, previous_results, qa_model, model_name, system_message, max_workers=1, scorer=None,
+              scheduler=None, pack_size=None):
+        """
+        Run only the tests whose inputs changed since a previous run, reusing the stored outcome of the rest.
+
+        Tests whose responses would be unchanged but whose expected result or scorer changed are
+        rescored from the stored responses without new completions. Tests that errored, and tests
+        whose perturb_method cannot be identified across runs (see Test.set_hashes), are always re-executed.
+        Tests are matched to their previous results by name, so names must be unique.
+
+        Parameters:
+        previous_results (list): The per-test results of the previous run, e.g. from load_results().
+        qa_model: The model to use for generating responses.
+        model_name (str): The name of the model.
+        system_message (str): A message providing context for the model.
+        max_workers (int): The number of tests to run concurrently. Defaults to 1.
+        scorer (CascadeScorer, optional): The scorer to use instead of the embedding model alone.
+        scheduler (RequestScheduler, optional): Send the completion requests through this scheduler.
+        pack_size (int, optional): Answer up to this many prompts in one numbered multi-question request.
+
+        Returns:
+        dict: The diff against the previous run (see diff_results), plus the names of the
+            tests that were executed, rescored and reused.
+        """
+        check_unique_names((test.name for test in self.tests), 'the suite')
+        check_unique_names((result['name'] for result in previous_results), 'the previous results')
+        self.model_name = model_name
+        previous = {result['name']: result for result in previous_results}
+        executed, rescored, reused = TestSuite(), TestSuite(), []
+        for test in self.tests:
+            test.set_hashes(model_name, system_message, scorer, pack_size)
+            before = previous.get(test.name)
+            if (before is None or before.get('error') or test.generation_hash is None
+                    or before.get('generation_hash') != test.generation_hash):
+                executed.add_test(test)
+            elif before.get('input_hash') != test.input_hash:
+                test.restore(before, scores=False)
+                rescored.add_test(test)
+            else:
+                test.restore(before)
+                reused.append(test)
+
+        executed.run_all(qa_model, model_name, system_message, max_workers=max_workers, scorer=scorer,
+                         scheduler=scheduler, pack_size=pack_size)
+        if scheduler is not None:
+            self.latency_report = executed.latency_report
+        if pack_size is not None:
+            self.packing_report = executed.packing_report
+        rescored.score_all(scorer)
+
+        results, _ = self.summarize()
+        report = diff_results(previous_results, results)
+        report['executed'] = [test.name for test in executed.tests]
+        report['rescored'] = [test.name for test in rescored.tests]
+        report['reused'] = [test.name for test in reused]
+        return report
+
+    def run_matrix(self, qa_model, models, system_message, max_workers=None, scorer=None, scheduler=None,
+                   pack_size=None):
+        """
+        Run every test against several models and compare them.
+
+        Perturbations are computed once and shared by all models, the completions of all
+        models run in one pool, and all responses are scored in a single batch in which each
+        expected result is embedded only once. The suite's own tests are left unscored.
+        Test names must be unique, as the result tables are indexed by name.
+
+        Parameters:
+        qa_model: The model to use for generating responses.
+        models (list): The names of the models to compare.
+        system_message (str): A message providing context for the model.
+        max_workers (int, optional): The number of completions to run concurrently. Defaults to one per model.
+        scorer (CascadeScorer, optional): The scorer to use instead of the embedding model alone.
+        scheduler (RequestScheduler, optional): Send the completion requests through this scheduler.
+        pack_size (int, optional): Answer up to this many prompts of the same model in one numbered
+            multi-question request. The packing report is kept in self.packing_report.
+
+        Returns:
+        dict: 'results' holds the per-test results of every model; 'score_original',
+            'score_perturb' and 'fail' are test x model tables; 'pairwise' holds the
+            wins, losses and ties of each pair of models on score_original.
+        """
+        # The result tables are indexed by test name.
+        check_unique_names((test.name for test in self.tests), 'the suite')
+        for test in self.tests:
+            test.apply_perturbation()
+
+        runs, jobs = TestSuite(), []
+        for model_name in models:
+            for test in self.tests:
+                run = copy.copy(test)
+                run.set_hashes(model_name, system_message, scorer, pack_size)
+                runs.add_test(run)
+                jobs.append((run, model_name))
+
+        packing_report = generate_responses(jobs, qa_model, system_message, max_workers=max_workers or len(models),
+                                            scheduler=scheduler, perturb=False, pack_size=pack_size)
+        if pack_size is not None:
+            self.packing_report = packing_report
+        if scheduler is not None:
+            self.latency_report = scheduler.latency_report()
+        runs.score_all(scorer)
+
+        results, _ = runs.summarize()
+        df = pd.DataFrame(results)
+        tables = {key: df.pivot(index='name', columns='model_name', values=key)[list(models)]
+                  for key in ('score_original', 'score_perturb', 'fail')}
+
+        pairwise = []
+        scores = tables['score_original']
+        for model_a, model_b in combinations(models, 2):
+            both = scores[model_a].notna() & scores[model_b].notna()
+            a, b = scores.loc[both, model_a], scores.loc[both, model_b]
+            pairwise.append({
+                'model_a': model_a,
+                'model_b': model_b,
+                'wins': int((a > b).sum()),
+                'losses': int((a < b).sum()),
+                'ties': int((a == b).sum())
+            })
+
+        return {'results': df, **tables, 'pairwise': pd.DataFrame(pairwise)}
+
+    def score_all(self, scorer=None):
+        """
+        Score the generated responses of all test cases in a single batch.
+
+        Parameters:
+        scorer (CascadeScorer, optional): The scorer to use. Defaults to the embedding model alone.
+        """
+        pairs = [test.score_pairs() for test in self.tests]
+        flat_pairs = [pair for test_pairs in pairs for pair in test_pairs]
+        if scorer is not None:
+            groups = [i for i, test_pairs in enumerate(pairs) for _ in test_pairs]
+            scores, stages = scorer.score(flat_pairs, groups)
+        else:
+            scores = batch_similarity(flat_pairs)
+            stages = ['embedding'] * len(scores)
+        start = 0
+        for test, test_pairs in zip(self.tests, pairs):
+            end = start + len(test_pairs)
+            test.set_scores(scores[start:end], stages[start:end])
+            start = end
 
     def summarize(self):
         """
@@ -41,24 +536,69 @@ class TestSuite:
         results (list): A list of dictionaries summarizing each test case.
         summary (dict): A summary of the test suite, including the total number of tests, number of failures, and failure rate.
         """
-        results = []
-        failure_count = 0
-        total_tests = len(self.tests)
+        results = [test.summarize() for test in self.tests]
+        return results, summarize_results(results)
 
-        for test in self.tests:
-            result = test.summarize()
-            if result['fail']:
-                failure_count += 1
-            results.append(result)
-
-        fail_rate = (failure_count / total_tests) * 100 if total_tests > 0 else 0
-        summary = {
-            'total_tests': total_tests,
-            'failures': failure_count,
-            'fail_rate': fail_rate
-        }
-
-        return results, summary
+    def deduplicate(self, threshold=0.95, mode='weight', model=None, **index_options):
+        """
+        Shrink the suite by collapsing tests with near-identical prompts.
+
+        All prompts are embedded in one batch and clustered with an approximate nearest-neighbour
+        index (see dedup.near_duplicate_clusters). Only tests with the same expected_result,
+        pass_condition, capability and perturbation are clustered together, so no capability or
+        perturbation loses coverage. The first test of each cluster is kept, and every other
+        test in the cluster is within the threshold of it.
+
+        Similarity is measured on the whole prompt, so tests from BulkPromptBuilder that share a
+        long Few Shot prefix have nearly identical embeddings even when their questions differ.
+        Use a threshold close to 1 for such suites, or deduplicate a suite built from the varying
+        part of the prompts alone.
+
+        Parameters:
+        threshold (float): The prompt cosine similarity at which tests count as duplicates. Defaults to 0.95.
+        mode (str): 'weight' gives each kept test the total weight of its cluster, so weighted
+            fail rates still account for the removed tests; 'drop' simply drops the duplicates.
+        model (SentenceTransformer, optional): The model to embed prompts with. Defaults to the shared similarity model.
+        **index_options: n_planes, n_tables, seed or chunk_size for the index.
+
+        Returns:
+        TestSuite: A new suite holding one test per cluster. Its dedup_report lists the clusters
+            of more than one test by name, and the number of tests removed.
+        """
+        if mode not in ('weight', 'drop'):
+            raise ValueError(f"Unsupported dedup mode: {mode}")
+
+        suite = TestSuite()
+        suite.dedup_report = {'clusters': [], 'removed': 0}
+        if not self.tests:
+            return suite
+
+        embeddings = encode_texts([test.prompt for test in self.tests], model)
+        groups = [(test.expected_result, test.pass_condition, test.capability, *test.perturbation_key())
+                  for test in self.tests]
+        for cluster in near_duplicate_clusters(embeddings, threshold, groups, **index_options):
+            members = [self.tests[i] for i in cluster]
+            representative = copy.copy(members[0])
+            if mode == 'weight':
+                representative.weight = sum(member.weight for member in members)
+            suite.add_test(representative)
+            if len(members) > 1:
+                suite.dedup_report['clusters'].append([member.name for member in members])
+                suite.dedup_report['removed'] += len(members) - 1
+        return suite
+
+    def analyze(self, by=GROUP_KEYS):
+        """
+        Break the results down by group.
+
+        Parameters:
+        by (str or tuple): The column(s) to group by. Defaults to capability, model_name and pass_condition.
+
+        Returns:
+        DataFrame: Fail rates and score-delta statistics per group (see analytics.analyze).
+        """
+        results, _ = self.summarize()
+        return analyze(results, by)
 
     def export_results(self, filename, file_format='csv', overwrite=False):
         """
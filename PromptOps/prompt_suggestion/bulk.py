@@ -0,0 +1,225 @@
+import pandas as pd
+
+DEFAULT_SENT_COMMAND = "Classify the sentiment of the text: "
+
+COT_SUFFIX = " Let's think step by step."
+
+TEMPLATES = ('Zero Shot', 'One Shot', 'Few Shot')
+
+TASKS = ('std_sent', 'cot_sent', 'std_qna', 'cot_qna')
+
+def format_sent_prompt(text, template='Zero Shot', examples=(), command=DEFAULT_SENT_COMMAND, cot=False):
+    """
+    Build a sentiment classification prompt in the format of prompt_suggest.std_sent.
+
+    Parameters:
+    text (str): The text to classify.
+    template (str): 'Zero Shot', 'One Shot' or 'Few Shot'.
+    examples (list): (text, sentiment) tuples. One Shot uses the first one, Few Shot all of them.
+    command (str): The instruction opening the prompt.
+    cot (bool): Whether to ask the model to think step by step.
+
+    Returns:
+    str: The prompt.
+    """
+    return sent_prefix(template, examples, command) + sent_query(template, text, cot)
+
+def sent_prefix(template, examples, command):
+    """
+    Build the part of a sentiment prompt shared by every text: the instruction and examples.
+    """
+    if template == 'Zero Shot':
+        return command + "\n\n"
+    elif template == 'One Shot':
+        text, sentiment = examples[0]
+        return f"{command}\n\nExample 1\nText: \"{text}\"\nSentiment: {sentiment}\n\n"
+    elif template == 'Few Shot':
+        shots = ''.join(f"Text: \"{text}\"\nSentiment: {sentiment}\n\n" for text, sentiment in examples)
+        return command + "\n\n" + shots
+    raise ValueError(f"Unknown template: {template}")
+
+def sent_query(template, text, cot=False):
+    """
+    Build the part of a sentiment prompt holding the text to classify.
+    """
+    suffix = COT_SUFFIX if cot else ''
+    if template == 'Few Shot':
+        return f"Text: {text} \nSentiment:{suffix}"
+    return f"Text: {text}\nSentiment:{suffix}"
+
+def format_qna_prompt(question, template='Zero Shot', examples=(), instruction='', context='', cot=False):
+    """
+    Build a question answering prompt in the format of prompt_suggest.std_qna.
+
+    Parameters:
+    question (str): The question to answer.
+    template (str): 'Zero Shot', 'One Shot' or 'Few Shot'.
+    examples (list): (question, answer) tuples. One Shot uses the first one, Few Shot all of them.
+    instruction (str): An optional instruction, rendered as an 'I:' line.
+    context (str): An optional context, rendered as a 'C:' line.
+    cot (bool): Whether to ask the model to think step by step.
+
+    Returns:
+    str: The prompt.
+    """
+    return qna_prefix(template, examples, qna_header(instruction, context)) + qna_query(template, question, cot)
+
+def qna_header(instruction='', context=''):
+    """
+    Build the instruction and context lines opening a question answering prompt.
+    """
+    instr = "I: " + instruction + "\n" if instruction else ''
+    ctx = "C: " + context + "\n" if context else ''
+    return f"{instr}\n{ctx}"
+
+def qna_prefix(template, examples, header):
+    """
+    Build the part of a question answering prompt before the question: the header and examples.
+    """
+    if template == 'Zero Shot':
+        return header
+    elif template == 'One Shot':
+        question, answer = examples[0]
+        return f"{header}\nQ: \"{question}\"\nA: {answer}\n\n"
+    elif template == 'Few Shot':
+        shots = ''.join(f"Q: \"{question}\"\nA: {answer}\n\n" for question, answer in examples)
+        return f"{header}\n{shots}"
+    raise ValueError(f"Unknown template: {template}")
+
+def qna_query(template, question, cot=False):
+    """
+    Build the part of a question answering prompt holding the question.
+    """
+    suffix = COT_SUFFIX if cot else ''
+    if template == 'Few Shot':
+        return f"Q: {question} \nA:{suffix}"
+    return f"Q: {question}\nA:{suffix}"
+
+class BulkPromptBuilder:
+    """
+    Build (prompt, expected_output) pairs for a whole dataset without any input() prompts.
+
+    The instruction and examples are rendered once; each row then only adds its own text.
+    """
+    def __init__(self, task='std_sent', template='Zero Shot', examples=None, command=DEFAULT_SENT_COMMAND,
+                 instruction='', context='', input_column='text', expected_column='expected_output',
+                 context_column=None):
+        """
+        Initialize a new BulkPromptBuilder instance.
+
+        Parameters:
+        task (str): 'std_sent', 'cot_sent', 'std_qna' or 'cot_qna', as in prompt_suggest.
+        template (str): 'Zero Shot', 'One Shot' or 'Few Shot'.
+        examples (list, optional): (input, answer) tuples for the One Shot and Few Shot templates.
+        command (str): The instruction of sentiment prompts.
+        instruction (str): The instruction of question answering prompts.
+        context (str): The context of question answering prompts, used when context_column is not given.
+        input_column (str): The column holding the text or question of each row. Defaults to 'text'.
+        expected_column (str): The column holding the expected output of each row. Defaults to 'expected_output'.
+        context_column (str, optional): The column holding a per-row context for question answering prompts.
+        """
+        if task not in TASKS:
+            raise ValueError(f"Unknown task: {task}")
+        if template not in TEMPLATES:
+            raise ValueError(f"Unknown template: {template}")
+        examples = list(examples or [])
+        if template != 'Zero Shot' and not examples:
+            raise ValueError(f"The {template} template needs at least one example.")
+
+        self.task = task
+        self.template = template
+        self.examples = examples
+        self.cot = task.startswith('cot')
+        self.qna = task.endswith('qna')
+        self.command = command
+        self.instruction = instruction
+        self.context = context
+        self.input_column = input_column
+        self.expected_column = expected_column
+        self.context_column = context_column
+        if self.qna:
+            self.prefix = qna_prefix(template, examples, qna_header(instruction, context))
+        else:
+            self.prefix = sent_prefix(template, examples, command)
+
+    def format(self, text, context=None):
+        """
+        Build the prompt for one input.
+
+        Parameters:
+        text (str): The text to classify or the question to answer.
+        context (str, optional): A context replacing the builder's own, for question answering prompts.
+
+        Returns:
+        str: The prompt.
+        """
+        if not self.qna:
+            return self.prefix + sent_query(self.template, text, self.cot)
+        prefix = self.prefix
+        if context is not None:
+            prefix = qna_prefix(self.template, self.examples, qna_header(self.instruction, context))
+        return prefix + qna_query(self.template, text, self.cot)
+
+    def rows(self, data):
+        """
+        Stream (input, expected_output, context) tuples from a DataFrame or an iterable of records.
+
+        Empty context cells, which a DataFrame holds as NaN, give a context of None.
+        """
+        if hasattr(data, 'columns'):
+            contexts = data[self.context_column] if self.context_column else [None] * len(data)
+            rows = zip(data[self.input_column], data[self.expected_column], contexts)
+        else:
+            rows = ((record[self.input_column], record[self.expected_column],
+                     record[self.context_column] if self.context_column else None) for record in data)
+        for text, expected_output, context in rows:
+            yield text, expected_output, None if pd.isna(context) else context
+
+    def build(self, data):
+        """
+        Generate the prompt and expected output of every row, in a single streaming pass.
+
+        Parameters:
+        data (DataFrame or iterable): The rows, as a DataFrame or as dictionaries.
+
+        Returns:
+        generator: (prompt, expected_output) tuples.
+        """
+        for text, expected_output, context in self.rows(data):
+            yield self.format(text, context), expected_output
+
+    def iter_tests(self, data, name_prefix='test', **test_kwargs):
+        """
+        Generate a Test for every row.
+
+        Parameters:
+        data (DataFrame or iterable): The rows, as a DataFrame or as dictionaries.
+        name_prefix (str): Tests are named '<name_prefix>_<row number>'. Defaults to 'test'.
+        **test_kwargs: Further Test arguments shared by all tests, e.g. perturb_method or capability.
+
+        Returns:
+        generator: Test instances.
+        """
+        # Imported here so that building prompts alone does not load the similarity model.
+        from ..prompt_scoring.test import Test
+
+        for i, (prompt, expected_output) in enumerate(self.build(data)):
+            yield Test(f"{name_prefix}_{i}", prompt, expected_output, **test_kwargs)
+
+    def build_suite(self, data, name_prefix='test', **test_kwargs):
+        """
+        Build a TestSuite holding a Test for every row.
+
+        Parameters:
+        data (DataFrame or iterable): The rows, as a DataFrame or as dictionaries.
+        name_prefix (str): Tests are named '<name_prefix>_<row number>'. Defaults to 'test'.
+        **test_kwargs: Further Test arguments shared by all tests, e.g. perturb_method or capability.
+
+        Returns:
+        TestSuite: The suite.
+        """
+        from ..prompt_scoring.test_suite import TestSuite
+
+        suite = TestSuite()
+        suite.tests = list(self.iter_tests(data, name_prefix, **test_kwargs))
+        return suite
@@ -1,5 +1,6 @@
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from ..prompt_scoring.scoring_client import get_scoring_client
 
 def cosine_score(text1, text2):
     """
@@ -12,6 +13,11 @@ def cosine_score(text1, text2):
     Returns:
     float: The cosine similarity score between the two texts.
     """
+    # Score on the warm scoring server when PROMPTOPS_SCORING_URL or set_scoring_server() selects one
+    client = get_scoring_client()
+    if client is not None:
+        return client.similarity([(text1, text2)])[0]
+
     # Load the pre-trained SentenceTransformer model
     model = SentenceTransformer('all-mpnet-base-v2')
 
@@ -1,4 +1,4 @@
-from setuptools import setup, find_packages
+from setuptools import setup
 
 setup(
     name='PromptOps',
@@ -6,12 +6,21 @@ setup(
     description='A Python library for prompt scoring and suggestion',
     author='ChommakornS',
     author_email='chommakorn.son@gmail.com',
-    packages=find_packages(),
+    # setup.py lives inside the package directory, so the package root is mapped onto it.
+    packages=['PromptOps', 'PromptOps.prompt_scoring', 'PromptOps.prompt_suggestion'],
+    package_dir={'PromptOps': '.'},
     install_requires=[
         'openai==0.28',
         'pandas',
         'sentence-transformers',
         'scikit-learn',
-        'langchain'
+        'langchain',
+        'pyarrow'
     ],
+    entry_points={
+        'console_scripts': [
+            'promptops=PromptOps.prompt_scoring.cli:main',
+            'promptops-scoring-server=PromptOps.prompt_scoring.scoring_server:main',
+        ],
+    },
 )
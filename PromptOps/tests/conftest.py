@@ -0,0 +1,36 @@
+import zlib
+import numpy as np
+import pytest
+from PromptOps.prompt_scoring import scoring_client
+from PromptOps.prompt_scoring import test as test_module
+
+class BagOfWordsModel:
+    """
+    A small deterministic stand-in for the SentenceTransformer model.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=False, batch_size=32):
+        self.calls += 1
+        embeddings = np.zeros((len(texts), 64))
+        for i, text in enumerate(texts):
+            if not isinstance(text, str):
+                raise TypeError(f"Cannot encode {type(text).__name__}")
+            for word in text.lower().split():
+                embeddings[i, zlib.crc32(word.encode('utf-8')) % 64] += 1
+        embeddings[:, 0] += 0.01
+        return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    def similarity(self, emb_a, emb_b):
+        return emb_a @ emb_b.T
+
+@pytest.fixture
+def local_model(monkeypatch):
+    """
+    Score with a BagOfWordsModel instead of the shared similarity model or a scoring server.
+    """
+    model = BagOfWordsModel()
+    monkeypatch.setattr(scoring_client, 'shared_client', None)
+    monkeypatch.setattr(test_module, 'similarity_model', model)
+    return model
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from PromptOps.prompt_scoring.analytics import ResultAnalytics, analyze
+from PromptOps.prompt_scoring.test_suite import TestSuite as Suite
+
+def random_results(count, seed=0):
+    rng = np.random.default_rng(seed)
+    results = []
+    for i in range(count):
+        score_original = rng.uniform(0.5, 1.0)
+        results.append({
+            'name': f"test_{i}",
+            'capability': rng.choice(["negation", "robustness", None]),
+            'model_name': rng.choice(["model_1", "model_2"]),
+            'pass_condition': "increase",
+            'score_original': score_original,
+            'score_perturb': None if i % 10 == 0 else score_original + rng.normal(0, 0.2),
+            'fail': bool(rng.random() < 0.3),
+            'weight': int(rng.integers(1, 4)),
+        })
+    return results
+
+def test_empty_results_give_an_empty_table():
+    assert analyze([]).empty
+    assert Suite().analyze().empty
+    assert ResultAnalytics().summary().empty
+
+def test_streaming_summary_matches_analyze():
+    results = random_results(3000)
+    analytics = ResultAnalytics()
+    for start in range(0, len(results), 700):
+        analytics.update(results[start:start + 700])
+
+    exact = analyze(results)
+    streamed = analytics.summary().loc[exact.index]
+    columns = ['total', 'failures', 'fail_rate', 'mean_delta', 'std_delta']
+    pd.testing.assert_frame_equal(streamed[columns], exact[columns], check_dtype=False)
+    percentiles = [column for column in exact if column.startswith('delta_p')]
+    # Streaming percentiles are estimated from 0.01-wide histogram bins.
+    assert np.abs(streamed[percentiles].to_numpy() - exact[percentiles].to_numpy()).max() <= 0.01
+
+def test_weight_counts_as_repetition():
+    results = random_results(40, seed=1)
+    repeated = [dict(result, weight=1) for result in results for _ in range(result['weight'])]
+    for by in ('capability', ('model_name', 'pass_condition')):
+        pd.testing.assert_frame_equal(analyze(results, by), analyze(repeated, by), check_dtype=False)
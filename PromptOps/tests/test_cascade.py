@@ -0,0 +1,32 @@
+import pytest
+from PromptOps.prompt_scoring.cascade import CascadeScorer
+from PromptOps.prompt_scoring.test import Test as PromptTest, batch_similarity
+
+# The original response is close enough for the token F1 stage, the perturbed one is not.
+PAIRS = [("the cat sat on the mat today", "the cat sat on the mat"),
+         ("a dog ran", "the cat sat on the mat")]
+
+@pytest.fixture
+def scorer(local_model):
+    return CascadeScorer(local_model)
+
+def test_ungrouped_pairs_are_decided_independently(scorer):
+    _, stages = scorer.score(PAIRS)
+    assert stages == ['token_f1', 'embedding']
+
+def test_grouped_pairs_are_decided_in_the_same_stage(scorer, local_model):
+    scores, stages = scorer.score(PAIRS, [0, 0])
+    assert stages == ['embedding', 'embedding']
+    # Both scores are on the embedding scale, as with embedding-only scoring.
+    assert scores == pytest.approx(batch_similarity(PAIRS, local_model))
+
+def test_exact_matches_short_circuit_within_a_group(scorer):
+    scores, stages = scorer.score([("Positive.", "positive"), ("a dog ran", "positive")], [0, 0])
+    assert stages == ['exact', 'embedding']
+    assert scores[0] == 1.0
+
+def test_test_scores_both_responses_in_one_stage(scorer):
+    test = PromptTest("t", "prompt", PAIRS[0][1])
+    test.original_response, test.perturb_response = PAIRS[0][0], PAIRS[1][0]
+    test.score(scorer)
+    assert (test.stage_original, test.stage_perturb) == ('embedding', 'embedding')
@@ -0,0 +1,54 @@
+import importlib
+import json
+import pandas as pd
+import pytest
+import PromptOps
+from PromptOps.prompt_scoring import cli
+from PromptOps.prompt_scoring.fake_backend import FakeBackend
+
+pytestmark = pytest.mark.usefixtures('local_model')
+
+def sentiment(text):
+    return "positive" if "good" in text else "negative"
+
+def test_shard_run_and_merge(tmp_path, capsys):
+    tests = pd.DataFrame({
+        'name': [f"test_{i}" for i in range(6)],
+        'prompt': ["The food was good"] * 6,
+        'expected_result': ["positive"] * 6,
+        'perturb_text': ["The food was good!", "The food was bad"] * 3,
+        'capability': ["robustness", "negation"] * 3,
+    })
+    tests_file = tmp_path / "tests.csv"
+    tests.to_csv(tests_file, index=False)
+
+    backend = FakeBackend(response=sentiment)
+    shards = [tmp_path / "shard_1.jsonl", tmp_path / "shard_2.jsonl"]
+    for i, shard in enumerate(shards, start=1):
+        cli.main(['run', str(tests_file), '--output', str(shard), '--shard', f"{i}/2",
+                  '--concurrency', '2'], qa_model=backend)
+    assert backend.calls == 12
+
+    merged_file = tmp_path / "merged.csv"
+    capsys.readouterr()
+    cli.main(['merge', *map(str, shards), '--output', str(merged_file)])
+    summary = json.loads(capsys.readouterr().out)
+
+    shard_names = [list(pd.read_json(shard, lines=True)['name']) for shard in shards]
+    assert shard_names == [["test_0", "test_2", "test_4"], ["test_1", "test_3", "test_5"]]
+    merged = pd.read_csv(merged_file)
+    assert sorted(merged['name']) == list(tests['name'])
+    assert list(merged.loc[merged['fail'], 'capability'].unique()) == ["negation"]
+    assert summary['total_tests'] == 6
+    assert summary['failures'] == 3
+
+def test_run_refuses_to_overwrite(tmp_path):
+    output = tmp_path / "results.csv"
+    output.write_text("")
+    with pytest.raises(SystemExit):
+        cli.main(['run', str(tmp_path / "tests.csv"), '--output', str(output)], qa_model=FakeBackend())
+
+def test_import_writes_nothing_to_stdout(capsys):
+    # The JSON reports of the CLI go to stdout, so importing the package must not print.
+    importlib.reload(PromptOps)
+    assert capsys.readouterr().out == ""
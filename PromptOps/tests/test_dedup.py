@@ -0,0 +1,18 @@
+import numpy as np
+from PromptOps.prompt_scoring.dedup import near_duplicate_clusters
+
+def test_clusters_do_not_chain():
+    angles = np.radians(np.arange(0, 90, 15))
+    embeddings = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    threshold = 0.95
+    clusters = near_duplicate_clusters(embeddings, threshold, n_planes=1, n_tables=4)
+    assert len(clusters) > 1
+    assert sorted(i for cluster in clusters for i in cluster) == list(range(len(embeddings)))
+    for members in clusters:
+        assert members == sorted(members)
+        assert np.all(embeddings[members] @ embeddings[members[0]] >= threshold)
+
+def test_groups_are_never_merged():
+    embeddings = np.tile([[1.0, 0.0]], (4, 1))
+    clusters = near_duplicate_clusters(embeddings, groups=["a", "b", "a", "b"])
+    assert clusters == [[0, 2], [1, 3]]
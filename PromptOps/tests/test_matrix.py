@@ -0,0 +1,29 @@
+import pytest
+from PromptOps.prompt_scoring.fake_backend import FakeBackend
+from PromptOps.prompt_scoring.test_suite import TestSuite as Suite, diff_results
+
+pytestmark = pytest.mark.usefixtures('local_model')
+
+def build_suite(names):
+    return Suite.from_records([
+        {'name': name, 'prompt': f"the movie {i} was good", 'expected_result': "good",
+         'perturb_text': f"the movie {i} was bad"}
+        for i, name in enumerate(names)
+    ])
+
+def test_run_matrix_tables():
+    suite = build_suite(["a", "b"])
+    matrix = suite.run_matrix(FakeBackend(), ["model_1", "model_2"], "system")
+    assert list(matrix['score_original'].index) == ["a", "b"]
+    assert list(matrix['score_original'].columns) == ["model_1", "model_2"]
+    assert matrix['pairwise'].loc[0, 'ties'] == 2
+
+def test_duplicate_names_are_rejected():
+    suite = build_suite(["a", "b", "a"])
+    with pytest.raises(ValueError, match="duplicated: a"):
+        suite.run_matrix(FakeBackend(), ["model_1", "model_2"], "system")
+    with pytest.raises(ValueError, match="duplicated: a"):
+        suite.rerun([], FakeBackend(), "model", "system")
+    results = [{'name': "a"}, {'name': "a"}]
+    with pytest.raises(ValueError, match="previous results"):
+        diff_results(results, [])
@@ -0,0 +1,80 @@
+import re
+import pytest
+from PromptOps.prompt_scoring.fake_backend import FakeBackend
+from PromptOps.prompt_scoring.packing import pack_prompts, parse_packed_response
+from PromptOps.prompt_scoring.test_suite import TestSuite as Suite
+
+QUESTION_PATTERN = re.compile(r'^Question (\d+):\n(.*)$', re.MULTILINE)
+
+def test_parse_numbered_answers():
+    response = "Answer 1: positive\nAnswer 2:  negative \n\nAnswer 3: neutral"
+    assert parse_packed_response(response, 3) == ["positive", "negative", "neutral"]
+
+def test_multiline_answers_are_kept_whole():
+    response = "Answer 1: first line\nsecond line\nAnswer 2: other"
+    assert parse_packed_response(response, 2) == ["first line\nsecond line", "other"]
+
+@pytest.mark.parametrize('response, expected', [
+    ("Answer 1: yes", ["yes", None]),
+    ("Answer 1: yes\nAnswer 2: no\nAnswer 2: maybe", ["yes", None]),
+    ("Answer 1: yes\nAnswer 3: no", ["yes", None]),
+    ("Answer 1:\nAnswer 2: no", [None, "no"]),
+    ("I cannot answer these.", [None, None]),
+    (None, [None, None]),
+])
+def test_unusable_answers_are_none(response, expected):
+    assert parse_packed_response(response, 2) == expected
+
+def answer_packed(text, skip=()):
+    """
+    Answer every question of a packed prompt except those in skip; echo single prompts.
+    """
+    questions = QUESTION_PATTERN.findall(text)
+    if not questions:
+        return f"reply to {text}"
+    return "\n".join(f"Answer {number}: reply to {question}"
+                     for number, question in questions if question not in skip)
+
+def build_suite(count):
+    return Suite.from_records([
+        {'name': f"test_{i}", 'prompt': f"original {i}", 'expected_result': "reply",
+         'perturb_text': f"perturbed {i}"}
+        for i in range(count)
+    ])
+
+@pytest.mark.usefixtures('local_model')
+def test_run_all_packs_prompts():
+    prompts = []
+    backend = FakeBackend(response=lambda text: prompts.append(text) or answer_packed(text))
+    suite = build_suite(4)
+    suite.run_all(backend, "model", "system", pack_size=2)
+
+    assert suite.packing_report == {'completions': 8, 'requests': 4, 'mean_pack_size': 2.0,
+                                    'fallbacks': 0, 'request_reduction': 0.5}
+    for prompt in prompts:
+        kinds = {question.split()[0] for _, question in QUESTION_PATTERN.findall(prompt)}
+        assert len(kinds) == 1
+    results, _ = suite.summarize()
+    assert [result['response_original'] for result in results] == [f"reply to original {i}" for i in range(4)]
+    assert [result['response_perturb'] for result in results] == [f"reply to perturbed {i}" for i in range(4)]
+
+@pytest.mark.usefixtures('local_model')
+def test_unparsed_answers_fall_back_to_single_requests():
+    backend = FakeBackend(response=lambda text: answer_packed(text, skip=("original 1",)))
+    suite = build_suite(5)
+    suite.run_all(backend, "model", "system", pack_size=2)
+
+    report = suite.packing_report
+    # 5 originals and 5 perturbed prompts give 2 packs and a single prompt each,
+    # plus one fallback for the skipped answer.
+    assert report['completions'] == 10
+    assert report['requests'] == 7
+    assert report['fallbacks'] == 1
+    assert backend.calls == 7
+    results, _ = suite.summarize()
+    assert results[1]['response_original'] == "reply to original 1"
+
+def test_pack_prompts_numbers_questions():
+    packed = pack_prompts(["first", "second"])
+    assert QUESTION_PATTERN.findall(packed) == [("1", "first"), ("2", "second")]
+    assert "exactly 2 answers" in packed
@@ -0,0 +1,58 @@
+from functools import partial
+import pytest
+from PromptOps.prompt_scoring.fake_backend import FakeBackend
+from PromptOps.prompt_scoring.perturb import perturb
+from PromptOps.prompt_scoring.test_suite import TestSuite as Suite
+
+pytestmark = pytest.mark.usefixtures('local_model')
+
+def shout(text, suffix='!'):
+    return text.upper() + suffix
+
+class Repeat:
+    def __call__(self, text, seed=None):
+        return text + ' ' + text
+
+def build_suite(perturb_method, perturb_seed=None):
+    suite = Suite.from_records([
+        {'name': f"test_{i}", 'prompt': f"the movie {i} was good", 'expected_result': "positive"}
+        for i in range(3)
+    ])
+    for test in suite.tests:
+        test.perturb_method = perturb_method
+        test.perturb_seed = perturb_seed
+    return suite
+
+def run_then_rerun(first_method, second_method, perturb_seed=None):
+    first = build_suite(first_method, perturb_seed)
+    first.run_all(FakeBackend(), "model", "system")
+    results, _ = first.summarize()
+    backend = FakeBackend()
+    report = build_suite(second_method, perturb_seed).rerun(results, backend, "model", "system")
+    return report, backend.calls
+
+def test_named_function_is_reused():
+    report, calls = run_then_rerun(perturb, perturb, perturb_seed=1)
+    assert report['reused'] == ["test_0", "test_1", "test_2"]
+    assert calls == 0
+
+def test_partial_arguments_are_part_of_the_hash():
+    report, calls = run_then_rerun(partial(shout, suffix='!'), partial(shout, suffix='!'))
+    assert len(report['reused']) == 3 and calls == 0
+    report, calls = run_then_rerun(partial(shout, suffix='!'), partial(shout, suffix='?'))
+    assert len(report['executed']) == 3 and calls == 6
+
+def test_callable_object_runs():
+    report, calls = run_then_rerun(Repeat(), Repeat())
+    assert len(report['executed']) == 3 and calls == 6
+    assert report['unchanged'] == []
+
+def test_edited_seeded_lambda_is_re_executed():
+    report, calls = run_then_rerun(lambda text, seed: text + '!', lambda text, seed: text + '!', perturb_seed=0)
+    assert len(report['reused']) == 3 and calls == 0
+    report, calls = run_then_rerun(lambda text, seed: text + '!', lambda text, seed: text + '?', perturb_seed=0)
+    assert len(report['executed']) == 3 and calls == 6
+
+def test_unseeded_lambda_is_always_re_executed():
+    report, calls = run_then_rerun(lambda text: text + '!', lambda text: text + '!')
+    assert len(report['executed']) == 3 and calls == 6
@@ -0,0 +1,74 @@
+import time
+from functools import partial
+from PromptOps.prompt_scoring.fake_backend import FakeBackend, with_stragglers
+import pytest
+from PromptOps.prompt_scoring.scheduler import RequestFailure, RequestScheduler
+from PromptOps.prompt_scoring.test_suite import TestSuite as Suite
+
+def run_prompts(scheduler, backend, prompts):
+    return scheduler.run([(len(prompt), partial(backend, prompt)) for prompt in prompts])
+
+def test_stuck_requests_do_not_starve_later_ones():
+    # With seed 1, 4 of the 12 calls draw the 3 second straggler latency.
+    backend = FakeBackend(with_stragglers(lambda rng: 0.01, 0.3, 3.0), seed=1)
+    scheduler = RequestScheduler(max_workers=2, timeout=0.3, hedge_percentile=None)
+    prompts = [f"prompt {i}" for i in range(12)]
+
+    start = time.monotonic()
+    results = run_prompts(scheduler, backend, prompts)
+    elapsed = time.monotonic() - start
+
+    report = scheduler.latency_report()
+    assert results.count(None) == report['timeouts'] == 4
+    assert all(result == prompt for result, prompt in zip(results, prompts) if result is not None)
+    assert elapsed < 3.0
+    assert report['requests'] == 12
+    assert report['p99'] >= 0.3
+
+def test_hedging_rescues_stragglers():
+    # With seed 53, only calls 9 and 41 draw the 2 second straggler latency, far enough
+    # apart that a request and its hedge never both straggle.
+    backend = FakeBackend(with_stragglers(lambda rng: 0.01, 0.05, 2.0), seed=53)
+    scheduler = RequestScheduler(max_workers=4, hedge_percentile=95, min_samples=20)
+    warmup = run_prompts(scheduler, FakeBackend(0.01), [f"warmup {i}" for i in range(20)])
+    assert None not in warmup
+
+    start = time.monotonic()
+    results = run_prompts(scheduler, backend, [f"prompt {i}" for i in range(40)])
+    elapsed = time.monotonic() - start
+
+    report = scheduler.latency_report()
+    assert results == [f"prompt {i}" for i in range(40)]
+    assert report['hedged'] > 0
+    assert report['timeouts'] == 0
+    assert elapsed < 1.0
+
+class RateLimitError(Exception):
+    pass
+
+def flaky(text):
+    if "bad" in text:
+        raise RateLimitError("Rate limit reached")
+    return text
+
+def test_failed_request_does_not_abort_the_run():
+    scheduler = RequestScheduler(max_workers=2, hedge_percentile=None)
+    results = scheduler.run([(1, partial(flaky, "good")), (1, partial(flaky, "bad")), (1, partial(flaky, "fine"))])
+    assert results[0] == "good" and results[2] == "fine"
+    assert isinstance(results[1], RequestFailure)
+    assert isinstance(results[1].error, RateLimitError)
+    assert scheduler.latency_report()['errors'] == 1
+
+@pytest.mark.usefixtures('local_model')
+@pytest.mark.parametrize('scheduler', [None, RequestScheduler(max_workers=2, hedge_percentile=None)])
+def test_failed_request_marks_only_its_test(scheduler):
+    suite = Suite.from_records([
+        {'name': "ok", 'prompt': "good movie", 'expected_result': "good", 'perturb_text': "great movie"},
+        {'name': "limited", 'prompt': "good movie", 'expected_result': "good", 'perturb_text': "bad movie"},
+    ])
+    suite.run_all(flaky, "model", "system", max_workers=2, scheduler=scheduler, pack_size=1)
+    results, summary = suite.summarize()
+    assert results[0]['error'] is None and results[0]['response_perturb'] == "great movie"
+    assert results[1]['error'] == "RateLimitError" and results[1]['response_original'] == "good movie"
+    assert results[1]['fail']
+    assert summary['errors'] == 1
@@ -0,0 +1,72 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+import pytest
+from PromptOps.prompt_scoring import test as test_module
+from PromptOps.prompt_scoring.scoring_client import ScoringClient, get_scoring_client
+from PromptOps.prompt_scoring.scoring_server import MicroBatcher, ScoringHandler, ScoringRequest
+from PromptOps.prompt_suggestion.cosine_score import cosine_score
+
+@pytest.fixture
+def server(local_model):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ScoringHandler)
+    server.batcher = MicroBatcher(local_model, max_batch_size=128, max_wait=0.05)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def post(url, data):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+def test_concurrent_requests_share_batches(server, local_model):
+    client = ScoringClient(server)
+    pairs = [(f"good movie {i}", "good") for i in range(16)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        scores = list(executor.map(lambda pair: client.similarity([pair])[0], pairs))
+
+    assert scores == pytest.approx(test_module.batch_similarity(pairs, local_model))
+    with urllib.request.urlopen(server + '/stats') as response:
+        stats = json.load(response)
+    assert stats['requests'] == 16
+    assert stats['batches'] < 16
+
+@pytest.mark.parametrize('path, body', [
+    ('/similarity', b'{not json'),
+    ('/similarity', json.dumps({'texts': ["a"]}).encode()),
+    ('/similarity', json.dumps({'pairs': [["a"]]}).encode()),
+    ('/similarity', json.dumps({'pairs': [[["a"], "b"]]}).encode()),
+    ('/encode', json.dumps({'texts': ["a", 1]}).encode()),
+    ('/encode', json.dumps({'texts': "a"}).encode()),
+])
+def test_malformed_requests_get_400(server, path, body):
+    status, response = post(server + path, body)
+    assert status == 400
+    assert response['error']
+
+def test_unknown_endpoint_gets_404(server):
+    assert post(server + '/unknown', b'{}')[0] == 404
+
+def test_failing_request_does_not_fail_its_batch(local_model):
+    batcher = MicroBatcher(local_model, max_wait=0)
+    good, bad = ScoringRequest('encode', ["good"]), ScoringRequest('encode', [None])
+    batcher.process([good, bad])
+    assert good.error is None and len(good.result) == 1
+    assert isinstance(bad.error, TypeError)
+    assert good.done.is_set() and bad.done.is_set()
+
+def test_set_scoring_server_switches_cosine_score(server, monkeypatch):
+    monkeypatch.setattr(test_module, 'similarity_model', None)
+    test_module.set_scoring_server(server)
+    assert get_scoring_client().url == server
+    score = cosine_score("good movie", "good movie")
+    assert score == pytest.approx(1.0)
+    with urllib.request.urlopen(server + '/stats') as response:
+        assert json.load(response)['requests'] == 1